@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module runs expensive work (computer moves, automatic scoring) off
+the event loop of the GUI.
+
+Background submits functions to a thread or process pool. Nothing is
+called back from the pool: the owner polls (e.g. with
+pyglet.clock.schedule_interval) and the callbacks of the finished tasks
+run in the polling thread, so they can change the model and the view.
+
+    background = Background(processes=True)
+    background.submit(on_done, genmove, player, model.clone(), label='Thinking')
+    pyglet.clock.schedule_interval(background.poll, 1/30)
+
+With processes the function and its arguments must be picklable (module
+level functions, models without wrapped methods, see Model.clone). Tasks
+that are already running cannot be stopped: cancel() drops them and their
+results are thrown away when they arrive.
+"""
+
+import time
+
+
+class Task:
+    """Work that was submitted to the pool.
+
+    Attributes:
+        future (Future)     : the result of the function
+        on_done (function)  : called with the result when the task is polled
+        label (str)         : what is being done, e.g. for a "thinking" message
+        start (float)       : time.perf_counter() of the submission
+    """
+
+    def __init__(self, future, on_done, label):
+        self.future = future
+        self.on_done = on_done
+        self.label = label
+        self.start = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        """Seconds since the task was submitted."""
+        return time.perf_counter() - self.start
+
+
+class Background:
+    """Thread or process pool whose results are collected by polling.
+
+    Attributes:
+        tasks (list): submitted tasks that have not been polled yet, oldest first
+    """
+
+    def __init__(self, processes=False, workers=1):
+        """
+        Arguments:
+            processes (bool): use processes instead of threads. Threads share
+                              the GIL with the event loop, processes keep it free
+            workers (int)   : size of the pool
+        """
+        self.processes = processes
+        self.workers = workers
+        self.executor = None
+        self.tasks = []
+
+    @property
+    def busy(self):
+        """True while tasks are running or waiting to be polled."""
+        return bool(self.tasks)
+
+    @property
+    def task(self):
+        """The oldest task that has not been polled yet (or None)."""
+        return self.tasks[0] if self.tasks else None
+
+    def _executor(self):
+        # imported here, so that the controller starts without concurrent.futures
+        import concurrent.futures
+        import multiprocessing
+
+        if self.executor is None:
+            if self.processes:
+                # spawn: the workers do not inherit the window and its OpenGL context
+                self.executor = concurrent.futures.ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self.executor = concurrent.futures.ThreadPoolExecutor(self.workers)
+        return self.executor
+
+    def submit(self, on_done, fn, *args, label=''):
+        """Runs fn(*args) in the pool.
+
+        Arguments:
+            on_done (function)  : on_done(result) is called by poll
+            fn (function)       : the work
+            label (str)         : description of the work
+
+        Returns:
+            (Task): the new task
+        """
+        task = Task(self._executor().submit(fn, *args), on_done, label)
+        self.tasks.append(task)
+        return task
+
+    def poll(self, dt=None):
+        """Calls the callbacks of the finished tasks in the order they were
+        submitted. Exceptions raised by a task are raised here.
+
+        Arguments:
+            dt (float): ignored (time since the last call of the pyglet clock)
+
+        Returns:
+            (int): number of finished tasks
+        """
+        finished = 0
+        while self.tasks and self.tasks[0].future.done():
+            task = self.tasks.pop(0)
+            finished += 1
+            task.on_done(task.future.result())
+        return finished
+
+    def wait(self, timeout=None):
+        """Blocks until all tasks are finished and polls them.
+
+        Returns:
+            (int): number of finished tasks
+        """
+        import concurrent.futures
+
+        concurrent.futures.wait([task.future for task in self.tasks], timeout)
+        return self.poll()
+
+    def cancel(self):
+        """Drops all tasks, their callbacks are not called anymore.
+
+        Returns:
+            (int): number of dropped tasks
+        """
+        tasks, self.tasks = self.tasks, []
+        for task in tasks:
+            task.future.cancel()
+        return len(tasks)
+
+    def close(self):
+        """Drops all tasks and shuts down the pool."""
+        self.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+def genmove(ai, model, close=False):
+    """Searches the move of a computer player, to be run in the pool.
+
+    Arguments:
+        ai              : computer player with genmove(model) and stats (e.g. mcts.MCTSPlayer)
+        model (Model)   : the position (a clone, it is sent to the pool)
+        close (bool)    : shut down the processes of ai afterwards (ai is a copy
+                          in a process pool)
+
+    Returns:
+        (tuple): the move, ai.stats and the state of ai.rng (None if ai has no
+                 rng), so that the original player can be updated
+    """
+    try:
+        move = ai.genmove(model)
+    finally:
+        if close:
+            ai.close()
+    rng = getattr(ai, 'rng', None)
+    return move, ai.stats, None if rng is None else rng.getstate()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module scores many finished positions at once with NumPy.
+
+The positions are stacked into an int8 array of shape (B, n, n) with
+EMPTY (0), BLACK_STONE (1) and WHITE_STONE (-1), boards[b, y, x] being
+the field (x, y) of position b. The flood fills are done for all boards
+simultaneously by repeatedly dilating boolean masks, so the number of
+Python-level iterations only depends on the extent of the largest region.
+
+score_boards gives the same result as Model.find_territory followed by
+Model._compute_score on a board without marked territory.
+"""
+
+import numpy as np
+
+BLACK = True
+WHITE = False
+
+EMPTY = 0
+BLACK_STONE = 1
+WHITE_STONE = -1
+
+
+def stack_boards(models):
+    """Stacks the boards of several games of the same size.
+
+    Arguments:
+        models (list): Model objects
+
+    Returns:
+        (np.ndarray): int8 array of shape (B, n, n)
+    """
+    values = {None: EMPTY, BLACK: BLACK_STONE, WHITE: WHITE_STONE}
+    return np.array([[[values[color] for color in row] for row in model._stones()] for model in models],
+                    dtype=np.int8)
+
+
+def _dilate(mask):
+    """Adds the four neighbours of every True field of the (B, n, n) mask."""
+    out = mask.copy()
+    out[:, 1:, :] |= mask[:, :-1, :]
+    out[:, :-1, :] |= mask[:, 1:, :]
+    out[:, :, 1:] |= mask[:, :, :-1]
+    out[:, :, :-1] |= mask[:, :, 1:]
+    return out
+
+
+def _reach(stones, empty):
+    """Finds all empty fields whose region borders on one of the stones.
+
+    Arguments:
+        stones (np.ndarray): boolean (B, n, n) mask of the stones
+        empty (np.ndarray) : boolean (B, n, n) mask of the empty fields
+
+    Returns:
+        (np.ndarray): boolean (B, n, n) mask
+    """
+    area = _dilate(stones) & empty
+    while True:
+        grown = _dilate(area) & empty
+        if np.array_equal(grown, area):
+            return area
+        area = grown
+
+
+def label_regions(boards):
+    """Labels the connected empty regions of every board.
+
+    Arguments:
+        boards (np.ndarray): int8 array of shape (B, n, n)
+
+    Returns:
+        (np.ndarray): int32 array of shape (B, n, n), 0 for stones, otherwise
+                      the label of the region (1 + smallest index y * n + x
+                      of the region, unique per board)
+    """
+    boards = np.asarray(boards)
+    size = boards.shape[1] * boards.shape[2]
+    empty = boards == EMPTY
+    index = np.arange(1, size + 1, dtype=np.int32).reshape(boards.shape[1:])
+    big = np.int32(size + 1)
+
+    labels = np.where(empty, index, big)
+    while True:
+        smallest = labels.copy()
+        np.minimum(smallest[:, 1:, :], labels[:, :-1, :], out=smallest[:, 1:, :])
+        np.minimum(smallest[:, :-1, :], labels[:, 1:, :], out=smallest[:, :-1, :])
+        np.minimum(smallest[:, :, 1:], labels[:, :, :-1], out=smallest[:, :, 1:])
+        np.minimum(smallest[:, :, :-1], labels[:, :, 1:], out=smallest[:, :, :-1])
+        smallest = np.where(empty, smallest, big)
+        if np.array_equal(smallest, labels):
+            break
+        labels = smallest
+
+    return np.where(empty, labels, 0)
+
+
+def find_territory(boards):
+    """Claims the empty regions that border on stones of one color only.
+
+    Arguments:
+        boards (np.ndarray): int8 array of shape (B, n, n)
+
+    Returns:
+        (np.ndarray): int8 array of shape (B, n, n), BLACK_STONE / WHITE_STONE
+                      for territory of that color, EMPTY otherwise
+    """
+    boards = np.asarray(boards)
+    empty = boards == EMPTY
+    black = _reach(boards == BLACK_STONE, empty)
+    white = _reach(boards == WHITE_STONE, empty)
+
+    territory = np.zeros(boards.shape, dtype=np.int8)
+    territory[black & ~white] = BLACK_STONE
+    territory[white & ~black] = WHITE_STONE
+    return territory
+
+
+def score_boards(boards):
+    """Scores a stack of finished boards.
+
+    Arguments:
+        boards (np.ndarray): int8 array of shape (B, n, n)
+
+    Returns:
+        (tuple): territory (see find_territory) and an int array of shape
+                 (B, 2) with the score of [white, black] per board (same
+                 layout as Model.score)
+    """
+    territory = find_territory(boards)
+    flat = territory.reshape(territory.shape[0], -1)
+    score = np.stack([(flat == WHITE_STONE).sum(axis=1), (flat == BLACK_STONE).sum(axis=1)], axis=1)
+    return territory, score
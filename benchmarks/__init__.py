@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the game engine. Run them from the project directory,
+e.g.:
+
+    python3 -m benchmarks.zobrist
+
+benchmarks.harness runs the whole suite and compares it with a baseline.
+"""
+
+import random
+
+from game_model import Model
+
+
+def random_game(n, seed, length=None, superko=False):
+    """Plays a random game and records the moves that were accepted.
+
+    Arguments:
+        n (int)        : size of the board
+        seed (int)     : seed of the random generator
+        length (int)   : maximal number of attempted moves (default 2 * n * n)
+        superko (bool) : record the game under positional superko, the moves
+                         are then valid with and without superko
+
+    Returns:
+        (list): (x, y) tuples of all valid moves in the order they were played
+    """
+    rng = random.Random(seed)
+    model = Model(n, superko=superko)
+    moves = []
+    for _ in range(length or 2 * n * n):
+        x, y = rng.randrange(n), rng.randrange(n)
+        if model.place_stone(x, y):
+            moves.append((x, y))
+    return moves
+
+
+def interleave(variants, repeat, run):
+    """Runs every variant repeat times, one round of all variants after the
+    other, so that they are affected by noise alike.
+
+    Arguments:
+        variants (dict)   : name -> argument of run
+        repeat (int)      : number of rounds
+        run (function)    : run(argument) returns a measurement, or None if
+                            the variant failed (it is not run again)
+
+    Returns:
+        (dict): name -> list of measurements in the order of the rounds,
+                None for a variant that failed
+    """
+    results = {name: [] for name in variants}
+    for _ in range(repeat):
+        for name, argument in variants.items():
+            if results[name] is not None:
+                value = run(argument)
+                results[name] = None if value is None else results[name] + [value]
+    return results
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Replays scripted GTP sessions (gtp.py) and reports commands per second.
+
+The script plays random games with play commands and mixes in what a
+match runner or an analysis tool sends: genmove followed by undo every
+10 moves, showboard every 50 moves and final_score at the end of every
+game. The engine answers genmove with random moves, so the numbers show
+the cost of the protocol and the rules engine, not of a search.
+
+    python3 -m benchmarks.gtp [--games 20] [--size 19] [--subprocess]
+
+--subprocess pipes the whole script through python3 gtp.py, start-up
+and I/O included.
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import game_records, percentiles
+from gtp import GTPEngine, vertex_table
+
+
+def script(n, games, seed=0):
+    """Creates the commands of a scripted session.
+
+    Returns:
+        (list): command lines (without line breaks)
+    """
+    names = vertex_table(n)[1]
+    lines = ['boardsize %d' % n, 'komi 6.5']
+    for record in game_records(n, games, seed):
+        lines.append('clear_board')
+        for number, (color, pos) in enumerate(record, 1):
+            move = 'pass' if pos is None else names[pos[1] * n + pos[0]]
+            lines.append('play %s %s' % ('b' if color else 'w', move))
+            if number % 10 == 0:
+                lines.append('genmove %s' % ('w' if color else 'b'))
+                lines.append('undo')
+            if number % 50 == 0:
+                lines.append('showboard')
+        lines.append('final_score')
+    return lines
+
+
+def run_engine(lines):
+    """Answers the commands in this process and times every command.
+
+    Returns:
+        (dict): command name -> list of latencies in nanoseconds
+    """
+    engine = GTPEngine(seed=0)
+    out = io.StringIO()
+    latencies = {}
+    for line in lines:
+        start = time.perf_counter_ns()
+        response = engine.handle(line)
+        out.write(response)
+        latencies.setdefault(line.split()[0], []).append(time.perf_counter_ns() - start)
+        if response.startswith('?'):
+            raise RuntimeError('%s: %s' % (line, response.strip()))
+    return latencies
+
+
+def run_subprocess(lines):
+    """Pipes the commands through python3 gtp.py.
+
+    Returns:
+        (float): seconds until all responses were read
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(root, 'gtp.py')],
+                            input='\n'.join(lines + ['quit']) + '\n',
+                            capture_output=True, text=True, check=True)
+    seconds = time.perf_counter() - start
+    errors = [response for response in result.stdout.split('\n\n') if response.startswith('?')]
+    if errors:
+        raise RuntimeError(errors[0])
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--size', type=int, default=19)
+    parser.add_argument('--subprocess', action='store_true', help='also run the script through a pipe')
+    args = parser.parse_args()
+
+    lines = script(args.size, args.games)
+    start = time.perf_counter()
+    latencies = run_engine(lines)
+    seconds = time.perf_counter() - start
+    print('%d commands on %dx%d in %.2f s: %.0f commands/s' % (
+        len(lines), args.size, args.size, seconds, len(lines) / seconds))
+
+    print('command        count   mean us    p50 us    p99 us')
+    for name, samples in sorted(latencies.items()):
+        stats = percentiles(samples)
+        print('%-12s %7d %9.1f %9.1f %9.1f' % (name, stats['count'], stats['mean'], stats['p50'], stats['p99']))
+
+    if args.subprocess:
+        seconds = run_subprocess(lines)
+        print('through a pipe: %.2f s, %.0f commands/s' % (seconds, len(lines) / seconds))
+
+
+if __name__ == '__main__':
+    main()
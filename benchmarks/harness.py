@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the rules engine, the scoring and the rendering.
+
+Seeded random games are replayed on boards of size 9, 13, 19 and 25 and
+the latency of every call is recorded. The results (percentiles per
+operation and board size) are written as JSON and can be compared with
+a saved baseline:
+
+    python3 -m benchmarks.harness --save baseline.json
+    python3 -m benchmarks.harness --compare baseline.json
+
+The rendering benchmark uses pyglet's headless mode (EGL) and is skipped
+if pyglet or a headless display is not available.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from game_model import Model
+from simulate import play_game
+
+SIZES = (9, 13, 19, 25)
+
+
+def percentiles(samples):
+    """Summarizes latencies given in nanoseconds.
+
+    Returns:
+        (dict): count, mean, p50, p90, p99 and max in microseconds
+    """
+    samples = sorted(samples)
+    count = len(samples)
+    if not count:
+        return {'count': 0}
+
+    def at(q):
+        return samples[min(count - 1, int(q * count))] / 1e3
+
+    return {'count': count, 'mean': sum(samples) / count / 1e3,
+            'p50': at(.5), 'p90': at(.9), 'p99': at(.99), 'max': samples[-1] / 1e3}
+
+
+def game_records(n, games, seed):
+    """Plays seeded random games.
+
+    Returns:
+        (list): one list of (color, (x, y) or None) per game
+    """
+    return [[(move.color, move.pos) for move in play_game(n, seed=seed + i)[0].moves] for i in range(games)]
+
+
+def _play(model, color, pos):
+    model.turn = color
+    if pos is None:
+        return model.passing()
+    return model.place_stone(*pos)
+
+
+def bench_engine(records, n, seed):
+    """Replays the records and times the engine calls.
+
+    Returns:
+        (dict): samples in ns per operation
+    """
+    timer = time.perf_counter_ns
+    samples = {'place_stone': [], 'get_data': [], 'get_changes': [],
+               'find_territory': [], 'mark_territory': []}
+    rng = random.Random(seed)
+
+    for record in records:
+        model = Model(n)
+        version = None
+        for color, pos in record:
+            if pos is None:
+                _play(model, color, pos)
+            else:
+                model.turn = color
+                start = timer()
+                model.place_stone(*pos)
+                samples['place_stone'].append(timer() - start)
+
+            start = timer()
+            model.get_data()
+            samples['get_data'].append(timer() - start)
+
+            start = timer()
+            version = model.get_changes(version)['version']
+            samples['get_changes'].append(timer() - start)
+
+        while not model.game_over:
+            model.passing()
+
+        start = timer()
+        model.find_territory()
+        samples['find_territory'].append(timer() - start)
+
+        for _ in range(n):
+            x, y = rng.randrange(n), rng.randrange(n)
+            start = timer()
+            model.mark_territory(x, y)
+            samples['mark_territory'].append(timer() - start)
+
+    return samples
+
+
+def _headless_window(n):
+    """Creates a client.Window without a display, None if not possible."""
+    try:
+        import pyglet
+        pyglet.options['headless'] = True
+        import client
+        # the images are looked up relative to the project, not to this script
+        pyglet.resource.path = [os.path.dirname(os.path.abspath(client.__file__))]
+        pyglet.resource.reindex()
+        return client.Window(n=n)
+    except Exception as error:  # no pyglet, no EGL, ...
+        print('rendering benchmark skipped: %s' % error, file=sys.stderr)
+        return None
+
+
+def bench_render(records, n):
+    """Replays the records into a headless window and times its updates.
+
+    Returns:
+        (dict): samples in ns per operation (empty if rendering is not available)
+    """
+    window = _headless_window(n)
+    if window is None:
+        return {}
+
+    timer = time.perf_counter_ns
+    samples = {'window.update': [], 'window.receive_changes': []}
+    try:
+        for record in records:
+            model = Model(n)
+            window.receive_data(model.get_data())
+            version = model.version
+            for color, pos in record:
+                _play(model, color, pos)
+
+                changes = model.get_changes(version)
+                version = changes['version']
+                start = timer()
+                window.receive_changes(changes)
+                samples['window.receive_changes'].append(timer() - start)
+
+                data = model.get_data()
+                start = timer()
+                window.receive_data(data)
+                samples['window.update'].append(timer() - start)
+    finally:
+        window.close()
+    return samples
+
+
+def run(sizes=SIZES, games=5, seed=0, render=True):
+    """Runs the whole suite.
+
+    Returns:
+        (dict): 'meta' and 'results' {size: {operation: percentiles}}
+    """
+    results = {}
+    for n in sizes:
+        records = game_records(n, games, seed)
+        samples = bench_engine(records, n, seed)
+        if render:
+            samples.update(bench_render(records, n))
+        results[str(n)] = {op: percentiles(values) for op, values in samples.items()}
+
+    meta = {'python': platform.python_version(), 'platform': platform.platform(),
+            'games': games, 'seed': seed, 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def compare(current, baseline, threshold=0.1, key='p50'):
+    """Compares two runs.
+
+    Arguments:
+        current, baseline (dict): results of run
+        threshold (float)       : relative slowdown that counts as regression
+        key (str)               : statistic that is compared
+
+    Returns:
+        (tuple): report lines and the list of regressions (size, operation, ratio)
+    """
+    lines = []
+    regressions = []
+    for size, ops in sorted(current['results'].items(), key=lambda item: int(item[0])):
+        for op, stats in sorted(ops.items()):
+            base = baseline['results'].get(size, {}).get(op)
+            if not base or key not in base or key not in stats or not base[key]:
+                continue
+            ratio = stats[key] / base[key]
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions.append((size, op, ratio))
+            lines.append('%3sx%-3s %-24s %10.2f us %10.2f us %7.2fx%s' % (
+                size, size, op, base[key], stats[key], ratio, flag))
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite for Project Go.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--games', type=int, default=5, help='seeded random games per board size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-render', action='store_true', help='skip the rendering benchmark')
+    parser.add_argument('--save', metavar='FILE', help='write the results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='compare with a saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed slowdown (default 0.1)')
+    args = parser.parse_args()
+
+    result = run(args.sizes, args.games, args.seed, not args.no_render)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(result, baseline, args.threshold)
+        print('%-7s %-24s %13s %13s %8s' % ('size', 'operation', 'baseline', 'current', 'ratio'))
+        print('\n'.join(lines))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
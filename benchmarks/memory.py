@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures the memory of live games and the allocations of place_stone.
+
+Seeded random games are replayed with tracemalloc running:
+
+    game            bytes held by a Model after the whole game (with the
+                    move history for undo)
+    position        bytes held after the move history has been dropped
+    no history      bytes held by a Model(history=False) after the whole game
+                    (as hosted by server.py)
+    blocks/move     memory blocks that are still allocated after a move
+    transient/move  bytes allocated and freed again during a move
+
+    python3 -m benchmarks.memory [--sizes 9 19] [--games 20]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from game_model import Model
+from benchmarks.harness import game_records
+
+
+def _play(model, color, pos):
+    model.turn = color
+    if pos is None:
+        return model.passing()
+    return model.place_stone(*pos)
+
+
+def measure(n, records):
+    """Replays the records and measures the memory.
+
+    Returns:
+        (dict): game, position, no_history (bytes per game), blocks,
+                transient (per move) and us (time per move without tracing)
+    """
+    # time first, tracemalloc slows down every allocation
+    start = time.perf_counter()
+    for record in records:
+        model = Model(n)
+        for color, pos in record:
+            _play(model, color, pos)
+    moves = sum(map(len, records))
+    us = (time.perf_counter() - start) / moves * 1e6
+
+    game = position = blocks = transient = 0
+    tracemalloc.start()
+    for record in records:
+        base = tracemalloc.get_traced_memory()[0]
+        model = Model(n)
+        for color, pos in record:
+            blocks -= sys.getallocatedblocks()
+            tracemalloc.reset_peak()
+            _play(model, color, pos)
+            current, peak = tracemalloc.get_traced_memory()
+            transient += peak - current
+            blocks += sys.getallocatedblocks()
+        game += tracemalloc.get_traced_memory()[0] - base
+
+        del model.moves[:]
+        position += tracemalloc.get_traced_memory()[0] - base
+        del model
+
+    no_history = 0
+    for record in records:
+        base = tracemalloc.get_traced_memory()[0]
+        model = Model(n, history=False)
+        for color, pos in record:
+            _play(model, color, pos)
+        no_history += tracemalloc.get_traced_memory()[0] - base
+        del model
+    tracemalloc.stop()
+
+    return {'game': game / len(records), 'position': position / len(records),
+            'no_history': no_history / len(records),
+            'blocks': blocks / moves, 'transient': transient / moves, 'us': us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[9, 19])
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print('%-7s %7s %12s %12s %12s %12s %15s %10s' % (
+        'size', 'moves', 'game', 'position', 'no history', 'blocks/move', 'transient/move', 'time/move'))
+    for n in args.sizes:
+        records = game_records(n, args.games, args.seed)
+        result = measure(n, records)
+        print('%3dx%-3d %7d %9.1f kB %9.1f kB %9.1f kB %12.1f %13.0f B %7.2f us' % (
+            n, n, sum(map(len, records)) // len(records), result['game'] / 1e3, result['position'] / 1e3,
+            result['no_history'] / 1e3, result['blocks'], result['transient'], result['us']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures how long the event loop is blocked while the computer player
+thinks, without a display.
+
+A 60 Hz loop stands in for pyglet.app.run: every frame it polls the
+controller (as pyglet.clock.schedule_interval does in the GUI) and
+renders the board of a HeadlessView. The frame time is the time the loop
+spends in a frame (poll and render), it has to stay below 16 ms. Without
+a background the search runs inside the frame that triggered it, with
+threads it competes with the loop for the GIL, with processes the loop
+only collects the result.
+
+    python3 -m benchmarks.responsiveness [--moves 5] [--playouts 300]
+"""
+
+import argparse
+import time
+
+from background import Background
+from benchmarks.harness import percentiles
+from controller import Controller
+from headless import HeadlessView
+from mcts import MCTSPlayer
+
+WHITE = False
+
+FRAME = 1 / 60
+
+
+def measure(background, moves, playouts):
+    """Lets the computer answer moves times and records the frame times.
+
+    Returns:
+        (tuple): frame times in nanoseconds and the total seconds
+    """
+    ai = MCTSPlayer(playouts=playouts, seed=0)
+    controller = Controller(ai=ai, ai_color=WHITE, view=HeadlessView(), background=background)
+
+    frames = []
+    answered = 0
+    start = time.perf_counter_ns()
+    while answered < moves or controller.busy:
+        frame = time.perf_counter_ns()
+        if not controller.busy:
+            # the human move, the answer is searched from here on
+            for x, y in controller.model.coords:
+                if controller.model.is_legal(x, y):
+                    controller.play((x, y))
+                    break
+            answered += 1
+        controller.poll()
+        controller.view.render()
+
+        now = time.perf_counter_ns()
+        frames.append(now - frame)
+        time.sleep(max(0., FRAME - (now - frame) / 1e9))
+    return frames, (time.perf_counter_ns() - start) / 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--moves', type=int, default=5, help='computer moves per mode')
+    parser.add_argument('--playouts', type=int, default=300)
+    args = parser.parse_args()
+
+    print('mode      frames   p50 ms   p99 ms   max ms  over 16 ms  total s')
+    for mode in ('off', 'thread', 'process'):
+        background = None if mode == 'off' else Background(processes=mode == 'process')
+        frames, seconds = measure(background, args.moves, args.playouts)
+        if background is not None:
+            background.close()
+        stats = percentiles(frames)
+        late = sum(1 for frame in frames if frame > 16e6)
+        print('%-8s %7d %8.1f %8.1f %8.1f %11d %8.1f' % (
+            mode, stats['count'], stats['p50'] / 1e3, stats['p99'] / 1e3, stats['max'] / 1e3,
+            late, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures how the cost of Model.place_stone grows with the size of the
+board.
+
+Random games are replayed on every size from 5x5 to 25x25. For every
+size the time per move is compared with the number of fields (n * n)
+and with the work a move does on groups: the stones of the group the
+new stone joins plus the stones it captures. The per-size tables
+(geometry.py) keep bounds checks and neighbour lookups out of the move,
+so the cost should follow the group work and not the board area. The
+plot is printed as text, --csv writes the numbers for other tools.
+
+    python3 -m benchmarks.scaling [--sizes 5 9 13 19 25] [--games 20] [--csv scaling.csv]
+"""
+
+import argparse
+import time
+
+from benchmarks import random_game
+from game_model import Model
+from geometry import MAX_SIZE, MIN_SIZE
+
+
+def measure(n, games, repeat=3):
+    """Replays random games on an n x n board.
+
+    Returns:
+        (tuple): microseconds per move (best of repeat) and the mean number
+                 of stones of the joined group and the captured groups
+    """
+    records = [random_game(n, seed) for seed in range(games)]
+    moves = sum(len(record) for record in records)
+
+    best = float('inf')
+    for _ in range(repeat):
+        models = [Model(n) for _ in records]
+        start = time.perf_counter()
+        for model, record in zip(models, records):
+            for x, y in record:
+                model.place_stone(x, y)
+        best = min(best, time.perf_counter() - start)
+
+    work = sum(move.group.size + sum(grp.size for grp in move.killed)
+               for model in models for move in model.moves)
+    return best / moves * 1e6, work / moves
+
+
+def fit(xs, ys):
+    """Least squares line through the points.
+
+    Returns:
+        (tuple): slope, intercept and coefficient of determination (R^2)
+    """
+    count = len(xs)
+    mx, my = sum(xs) / count, sum(ys) / count
+    sxx = sum((x - mx) ** 2 for x in xs)
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    syy = sum((y - my) ** 2 for y in ys)
+    slope = sxy / sxx if sxx else 0.
+    r2 = sxy * sxy / (sxx * syy) if sxx and syy else 1.
+    return slope, my - slope * mx, r2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(range(MIN_SIZE, MAX_SIZE + 1, 2)))
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--csv', help='write size, fields, us/move and group work to this file')
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.sizes:
+        cost, work = measure(n, args.games)
+        rows.append((n, n * n, cost, work))
+
+    width = 40
+    top = max(row[2] for row in rows)
+    print(' size  fields  us/move  group work')
+    for n, fields, cost, work in rows:
+        print('%5d %7d %8.2f %11.1f  %s' % (n, fields, cost, work, '#' * int(round(cost / top * width))))
+
+    first, last = rows[0], rows[-1]
+    print('%dx%d -> %dx%d: board area x%.1f, group work x%.1f, us/move x%.1f' % (
+        first[0], first[0], last[0], last[0], last[1] / first[1], last[3] / first[3], last[2] / first[2]))
+    costs = [row[2] for row in rows]
+    for name, column in (('board area', 1), ('group work', 3)):
+        slope, intercept, r2 = fit([row[column] for row in rows], costs)
+        print('us/move = %.2f + %.4f * %s  (R^2 %.3f)' % (intercept, slope, name, r2))
+
+    if args.csv:
+        with open(args.csv, 'w') as f:
+            f.write('size,fields,us_per_move,group_work\n')
+            for row in rows:
+                f.write('%d,%d,%.3f,%.2f\n' % row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures the import and startup time of the headless and the GUI controller.
+
+Every run is a fresh interpreter, so nothing is cached between runs.
+The GUI is created with pyglet's headless mode (EGL) and is skipped if
+that is not available.
+
+    python3 -m benchmarks.startup [--repeat 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import interleave
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = {
+    'headless': '''
+import sys, time, json
+start = time.perf_counter()
+from controller import Controller
+imported = time.perf_counter()
+Controller()
+ready = time.perf_counter()
+print(json.dumps({'import': imported - start, 'startup': ready - imported, 'pyglet': 'pyglet' in sys.modules}))
+''',
+    'gui': '''
+import sys, time, json
+start = time.perf_counter()
+import pyglet
+pyglet.options['headless'] = True
+from controller import Controller
+from client import Window
+imported = time.perf_counter()
+Controller(view=Window(n=9))
+ready = time.perf_counter()
+print(json.dumps({'import': imported - start, 'startup': ready - imported, 'pyglet': 'pyglet' in sys.modules}))
+''',
+}
+
+
+def measure(script):
+    """Runs a script in a new interpreter.
+
+    Returns:
+        (dict): import and startup time (s) reported by the script, the wall
+                time of the whole process and whether pyglet was imported,
+                None if the script failed
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', script], cwd=PROJECT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    wall = time.perf_counter() - start
+    if result.returncode:
+        print(result.stderr.strip().splitlines()[-1], file=sys.stderr)
+        return None
+    values = json.loads(result.stdout.strip().splitlines()[-1])
+    values['process'] = wall
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    results = interleave(SCRIPTS, args.repeat, measure)
+
+    print('%-10s %12s %12s %12s  %s' % ('front-end', 'import', 'startup', 'process', 'pyglet'))
+    for name, runs in results.items():
+        if not runs:
+            print('%-10s skipped' % name)
+            continue
+        median = {key: statistics.median(run[key] for run in runs) * 1e3
+                  for key in ('import', 'startup', 'process')}
+        print('%-10s %9.1f ms %9.1f ms %9.1f ms  %s' % (
+            name, median['import'], median['startup'], median['process'],
+            'imported' if runs[0]['pyglet'] else 'not imported'))
+
+
+if __name__ == '__main__':
+    main()
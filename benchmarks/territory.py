@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures Terr_Template.find_territory on positions of random games.
+
+    python3 -m benchmarks.territory [--sizes 19 25] [--positions 50]
+"""
+
+import argparse
+import random
+import time
+
+from game_model import Model
+from simulate import play_out
+
+
+def positions(n, count, seed=0):
+    """Creates positions of random games that were stopped after a random
+    number of moves (from an almost empty to a full board).
+
+    Returns:
+        (list): finished Model objects
+    """
+    rng = random.Random(seed)
+    models = []
+    for _ in range(count):
+        model = Model(n)
+        play_out(model, rng=rng, max_moves=rng.randrange(n * n // 4, 3 * n * n))
+        models.append(model)
+    return models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[19, 25])
+    parser.add_argument('--positions', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        models = positions(n, args.positions)
+        models.append(Model(n))  # one large empty region
+        models[-1].game_over = True
+
+        times = []
+        for model in models:
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                model.find_territory()
+                best = min(best, time.perf_counter() - start)
+            times.append(best * 1e3)
+
+        times.sort()
+        print('%dx%d: %d positions, median %.3f ms, max %.3f ms, total %.1f ms' % (
+            n, n, len(times), times[len(times) // 2], times[-1], sum(times)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures the hit rate of the transposition table (transposition.py) on
+replays of game records.
+
+Every game is replayed move by move with place_stone and scored with
+find_territory after every --every moves (as an analysis that shows the
+score while it steps through a game) and at the end. The archive is
+replayed several times, like an analysis that goes over the same games
+again. Within one pass only positions that occur in several games are
+found in the table (openings of real archives), random games hardly ever
+share a position. The moves do not use the table, they are timed apart
+from the scoring so that the two can be compared.
+
+    python3 -m benchmarks.transposition [archive.sgf] [--passes 3] [--limits 64 1024 16384]
+"""
+
+import argparse
+import time
+
+import sgf
+from game_model import Model
+from simulate import play_game
+from transposition import TranspositionTable, attach
+
+
+def random_records(n, count, seed=0):
+    """Plays random games and returns them in the format of sgf.iter_games."""
+    games = []
+    for i in range(count):
+        model, _ = play_game(n, seed=seed + i)
+        games.append({'size': n, 'properties': {}, 'setup': [],
+                      'moves': [(move.color, move.pos) for move in model.moves]})
+    return games
+
+
+def replay(games, passes, every, table=None):
+    """Replays and scores all games passes times.
+
+    Returns:
+        (tuple): seconds of the moves, seconds of the scoring, number of
+                 moves and number of scored positions
+    """
+    moves = scores = 0
+    move_seconds = score_seconds = 0.
+    timer = time.perf_counter
+    for _ in range(passes):
+        for game in games:
+            model = Model(game['size'])
+            if table is not None:
+                attach(model, table)
+            start = timer()
+            for k, (color, pos) in enumerate(game['moves'], 1):
+                model.turn = color
+                if pos is None:
+                    model.passing()
+                else:
+                    model.place_stone(*pos)
+                if k % every == 0:
+                    move_seconds += timer() - start
+                    start = timer()
+                    model.find_territory()
+                    score_seconds += timer() - start
+                    scores += 1
+                    # the game goes on, find_territory only scores a position without territory
+                    for y, row in enumerate(model.territory):
+                        for x, color in enumerate(row):
+                            if color is not None:
+                                model._set_territory(x, y, None)
+                    start = timer()
+            while not model.game_over:
+                model.passing()
+            move_seconds += timer() - start
+            moves += len(game['moves'])
+
+            start = timer()
+            model.find_territory()
+            score_seconds += timer() - start
+            scores += 1
+    return move_seconds, score_seconds, moves, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('files', nargs='*', help='SGF files (default: random games)')
+    parser.add_argument('--games', type=int, default=50, help='number of random games')
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--passes', type=int, default=3)
+    parser.add_argument('--every', type=int, default=10, help='moves between two scorings')
+    parser.add_argument('--limits', type=int, nargs='+', default=[64, 1024, 16384],
+                        help='memory limits in kB')
+    args = parser.parse_args()
+
+    if args.files:
+        games = [game for source in args.files for game in sgf.iter_games(source)]
+    else:
+        games = random_records(args.size, args.games)
+
+    move_seconds, score_seconds, moves, scores = replay(games, args.passes, args.every)
+    print('%d games, %d passes, %d moves (%.1f us/move), %d scorings: %.1f us/scoring without table' % (
+        len(games), args.passes, moves, move_seconds / moves * 1e6, scores, score_seconds / scores * 1e6))
+
+    for limit in args.limits:
+        for policy in ('lru', 'depth'):
+            table = TranspositionTable(limit << 10, policy)
+            move_seconds, score_seconds, moves, scores = replay(games, args.passes, args.every, table)
+            stats = table.stats()
+            print('%5d kB %-5s: hit rate %5.1f%%, %6d entries, %6d evictions, %6.1f us/move, %6.1f us/scoring' % (
+                limit, policy, stats['hit_rate'] * 100, stats['entries'], stats['evictions'],
+                move_seconds / moves * 1e6, score_seconds / scores * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measures the overhead of the Zobrist hashing and of the positional
+superko check in Model.place_stone.
+
+The games are seeded random games recorded under positional superko, so
+all variants replay exactly the same moves and the superko variant runs
+its check (the hash of the position after the move) on every one of
+them. Every game is timed on its own and the best time of a game over
+several interleaved rounds is kept, so an interruption only spoils one
+game of one round.
+
+    python3 -m benchmarks.zobrist [--size 19] [--games 20] [--seed 0]
+"""
+
+import argparse
+import gc
+import time
+
+from benchmarks import interleave, random_game
+from game_model import Model
+
+
+class PlainModel(Model):
+    """Model without hash updates, used as reference (the hash of a move is
+    only computed in _next_hash)."""
+
+    def _next_hash(self, p, captured):
+        return 0
+
+
+def replay(cls, n, games, **kwargs):
+    """Replays all games.
+
+    Returns:
+        (list): seconds per game
+    """
+    times = []
+    gc.collect()
+    gc.disable()  # as timeit does, a collection would be charged to a random game
+    try:
+        for game in games:
+            start = time.perf_counter()
+            model = cls(n, **kwargs)
+            for x, y in game:
+                model.place_stone(x, y)
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=19)
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    games = [random_game(args.size, seed, superko=True) for seed in range(args.seed, args.seed + args.games)]
+
+    variants = {'no hash': (PlainModel, {}),
+                'zobrist': (Model, {}),
+                'zobrist + superko': (Model, {'superko': True})}
+    results = interleave(variants, args.repeat, lambda variant: replay(variant[0], args.size, games, **variant[1]))
+    moves = sum(map(len, games))
+    best = {name: sum(map(min, zip(*rounds))) / moves * 1e6 for name, rounds in results.items()}
+
+    base = best['no hash']
+    print('%dx%d board, %d games (seeds %d-%d), %d moves, %d superko checks, best of %d' % (
+        args.size, args.size, args.games, args.seed, args.seed + args.games - 1, moves, moves, args.repeat))
+    for name, value in best.items():
+        print('%-20s %8.2f us/move  %+6.1f%%' % (name, value, (value / base - 1) * 100))
+
+
+if __name__ == '__main__':
+    main()
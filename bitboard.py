@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+""" This document contains a bitboard implementation of the game's model.
+
+Every color is stored as a single (arbitrary-precision) integer in which the
+bit y * n + x is set if there is a stone of that color on the field (x, y).
+Finding groups, counting liberties and capturing stones are therefore a few
+shift/AND/OR operations on those integers instead of updates of Group objects.
+
+BitboardModel exposes the same interface as game_model.Model
+(place_stone, passing, get_data, find_territory and mark_territory).
+"""
+
+from geometry import check_size, edge_masks
+
+BLACK = True
+WHITE = False
+
+
+def _popcount(bits):
+    return bin(bits).count('1')
+
+
+class BitboardModel:
+
+    def __init__(self, n=11):
+        """
+        Initialises Game attributes.
+        """
+        # Gameplay attributes
+        self.size = check_size(n)  # size of board (int)
+        self.turn = BLACK
+        self.blocked_field = None  # Ko-rule
+        self.has_passed = False
+        self.game_over = False
+
+        self.full, self.not_left, self.not_right = edge_masks(n)
+
+        self.stones = [0, 0]  # bitboards indexed by color
+        self.territory_bits = [0, 0]  # bitboards indexed by color
+
+        self.score = [0, 0]
+        self.captured = [0, 0]
+
+    def _neighbours(self, bits):
+        """Returns all fields adjacent to the fields in bits (without bits itself
+        if they are not adjacent to each other).
+        """
+        n = self.size
+        return (((bits & self.not_right) << 1) | ((bits & self.not_left) >> 1) |
+                ((bits << n) & self.full) | (bits >> n))
+
+    def _flood(self, seed, mask):
+        """Grows seed inside of mask until it covers the connected area.
+
+        Arguments:
+            seed (int): bitboard of the starting fields
+            mask (int): bitboard of the fields the area may grow into
+
+        Returns:
+            (int): bitboard of the connected area
+        """
+        area = seed & mask
+        while True:
+            grown = (area | self._neighbours(area)) & mask
+            if grown == area:
+                return area
+            area = grown
+
+    def _empty(self):
+        return self.full & ~(self.stones[BLACK] | self.stones[WHITE])
+
+    def passing(self):
+        """Checks if player has passed and changes the respective attributes accordingly.
+
+        Returns:
+            (bool): True if a player has passed or not, False if both players have passed
+        """
+        if self.game_over:
+            return False
+
+        if not self.has_passed:
+            self.turn = not self.turn
+            self.blocked_field = None
+            self.has_passed = True
+            return True
+
+        self.game_over = True
+        return True
+
+    def _to_list(self, bits):
+        """Converts a pair of color bitboards to a 2d list of colors (or None)."""
+        n = self.size
+        black, white = bits[BLACK], bits[WHITE]
+        rows = []
+        bit = 1
+        for _ in range(n):
+            row = [None] * n
+            for x in range(n):
+                if black & bit:
+                    row[x] = BLACK
+                elif white & bit:
+                    row[x] = WHITE
+                bit <<= 1
+            rows.append(row)
+        return rows
+
+    def _stones(self):
+        """Creates a multidimensional list containing the color of the stones
+        on their respective coordinates (or None for no stone).
+
+        Returns:
+            (2d list): color of stones
+        """
+        return self._to_list(self.stones)
+
+    @property
+    def territory(self):
+        """Territory as a multidimensional list (same layout as Model.territory)."""
+        return self._to_list(self.territory_bits)
+
+    def get_data(self):
+        """Prepares data for the GUI.
+
+        Returns:
+            (dict): all relevant information for the GUI (e.g. score, game status etc.)
+        """
+        data = {
+            'size': self.size,
+            'stones': self._stones(),
+            'territory': self.territory,
+            'game_over': self.game_over,
+            'score': (self.score[0] + self.captured[0], self.score[1] + self.captured[1]),
+            'color': self.turn
+        }
+        return data
+
+    def place_stone(self, x, y):
+        """ Checks the validity of the stone to be placed and places it.
+
+            Arguments:
+                x       : x-coordinate of stone to place
+                y       : y-coordinate of stone to place
+            Return:
+                (bool)  : True if move is valid, False otherwise (also for a
+                          field outside the board).
+        """
+        if self.blocked_field == (x, y):
+            return False
+
+        if self.game_over:
+            return False
+
+        n = self.size
+        if not (0 <= x < n and 0 <= y < n):
+            return False
+        stone = 1 << (y * n + x)
+        if (self.stones[BLACK] | self.stones[WHITE]) & stone:
+            return False
+
+        own = self.stones[self.turn] | stone
+        other = self.stones[not self.turn]
+        empty = self.full & ~(own | other)
+
+        killed = 0
+        candidates = self._neighbours(stone) & other
+        while candidates:
+            grp = self._flood(candidates & -candidates, other)
+            candidates &= ~grp
+            if not self._neighbours(grp) & empty:
+                killed |= grp
+
+        if killed:
+            other &= ~killed
+            empty |= killed
+        else:
+            grp = self._flood(stone, own)
+            if not self._neighbours(grp) & empty:
+                return False  # suicide
+
+        self.stones[self.turn] = own
+        self.stones[not self.turn] = other
+        self.captured[self.turn] += _popcount(killed)
+
+        # Ko-rule: a single stone captured a single stone
+        if killed & (killed - 1) == 0 and killed and not self._neighbours(stone) & own:
+            pos = killed.bit_length() - 1
+            self.blocked_field = (pos % self.size, pos // self.size)
+        else:
+            self.blocked_field = None
+
+        self.has_passed = False
+        self.turn = not self.turn
+        return True
+
+    def find_territory(self):
+        """Tries to automatically claim territory for the proper players.
+
+        Claims empty areas that are completely surrounded by one color,
+        it does not recognise prisoners or dead groups.
+
+        Attributes updated by this function:
+            self.score
+            self.territory_bits
+        """
+        black, white = self.stones[BLACK], self.stones[WHITE]
+        empty = self._empty()
+        territory = [0, 0]
+
+        while empty:
+            area = self._flood(empty & -empty, empty)
+            empty &= ~area
+            border = self._neighbours(area)
+            if border & black and not border & white:
+                territory[BLACK] |= area
+            elif border & white and not border & black:
+                territory[WHITE] |= area
+
+        self.territory_bits = territory
+        self._compute_score()
+
+    def mark_territory(self, x, y):
+        """Function that can be evoked by user to claim territory for
+        one player.
+        For empty fields it will also mark all adjacent empty fields,
+        for fields that contain a stone it will mark the entire stone
+        group and all adjacent empty spaces.
+
+        Arguments:
+            x, y (int): coordinates of the field
+
+        Attributes updated by this function:
+            self.score
+            self.territory_bits
+        """
+        if not self.game_over:
+            return
+
+        field = 1 << (y * self.size + x)
+        empty = self._empty()
+        territory = self.territory_bits
+
+        if territory[BLACK] & field:
+            current = BLACK
+        elif territory[WHITE] & field:
+            current = WHITE
+        else:
+            current = None
+
+        if empty & field:
+            color = {None: BLACK, BLACK: WHITE, WHITE: None}[current]
+            area = self._flood(field, empty)
+        else:
+            stone_color = bool(self.stones[BLACK] & field)
+            color = (not stone_color) if current is None else None
+            area = self._flood(field, self.stones[stone_color])
+            area |= self._flood(self._neighbours(area) & empty, empty)
+
+        territory[BLACK] &= ~area
+        territory[WHITE] &= ~area
+        if color is not None:
+            territory[color] |= area
+
+        self._compute_score()
+
+    def _compute_score(self):
+        occupied = self.stones[BLACK] | self.stones[WHITE]
+        self.score = [0, 0]
+        for color in (BLACK, WHITE):
+            bits = self.territory_bits[color]
+            self.score[color] = _popcount(bits) + _popcount(bits & occupied)
@@ -49,6 +49,28 @@ class Window(pyglet.window.Window):
         self.data.update(data)
         self.update()
 
+    def receive_changes(self, changes):
+        """ Applies the changes received from the controller and updates only
+            the affected fields of the view.
+
+            Arguments:
+                changes : data received from controller (dict), see Model.get_changes
+        """
+        if changes['full']:
+            self.receive_data(changes)
+            return
+
+        for key in ('game_over', 'score', 'color'):
+            self.data[key] = changes[key]
+        for (i, j), color in changes['stones'].items():
+            self.data['stones'][j][i] = color
+        for (i, j), color in changes['territory'].items():
+            self.data['territory'][j][i] = color
+
+        self._update_labels()
+        for i, j in changes['stones']:
+            self._update_field(i, j)
+
     def init_display(self):
         """ Contains all the none changing images and labels to be drawn."""
 
@@ -79,6 +101,7 @@ class Window(pyglet.window.Window):
         self.info = pyglet.text.Label(x=310, y=50, text='Welcome!', color=(0, 0, 0, 255),
                                       font_size=12, batch=self.batch, bold=True, group=self.grp_label)
 
+        self.debug = None
         self.graphical_obj = []
         self.background = Sprite(self.image_background, batch=self.batch, group=self.grp_back)
         self.grid = Grid(350, 350, n=self.data['size'], width=self.width - 200, height=self.height - 200,
@@ -99,6 +122,56 @@ class Window(pyglet.window.Window):
         self.button_pass = Button(pos=(635, 30), text='Pass', batch=self.batch)
         self.button_newgame = Button(pos=(65, 30), text='New Game', batch=self.batch)
 
+        self.img_turn = {None: self.image_black_stone, True: self.image_black_stone, False: self.image_white_stone}
+        self.img_turn_updated = Sprite(self.img_turn[self.data['color']], x=620, y=655,
+                                       batch=self.batch, group=self.grp_label)
+        self.img_turn_updated.scale = 1./4
+
+        # One stone sprite and one territory marker per intersection, they are
+        # only shown/changed when the corresponding field changes.
+        n = self.data['size']
+        scale = 1. / 3 * min(1., 8. / (n - 1))  # the images fit the fields of a 9x9 board
+        self.stones_sprites = []
+        self.territory_markers = []
+        for j in range(n):
+            sprites = []
+            markers = []
+            for i in range(n):
+                x, y = self.grid.get_coords(i, j)
+                _s = Sprite(self.image_black_stone, x=x, y=y, batch=self.batch_stones, group=self.grp_stones)
+                _s.scale = scale
+                _s.visible = False
+                sprites.append(_s)
+                markers.append(Circle(x=x, y=y, r=5, batch=self.batch_stones, group=self.grp_territory,
+                                      visible=False))
+            self.stones_sprites.append(sprites)
+            self.territory_markers.append(markers)
+
+        self.shown_stones = [[None for _ in range(n)] for _ in range(n)]
+        self.shown_territory = [[None for _ in range(n)] for _ in range(n)]
+
+    def show_message(self, text):
+        """ Shows a message (e.g. whose turn it is) below the board.
+
+            Arguments:
+                text    : the message
+        """
+        self.info.text = text
+
+    def show_debug(self, text):
+        """ Shows a (multi-line) debug text in the upper left corner.
+
+            Arguments:
+                text    : text to show, an empty string hides it
+        """
+        if getattr(self, 'debug', None) is None:
+            self.debug = pyglet.text.Label(x=10, y=self.height - 10, text='', color=(0, 0, 0, 255),
+                                           font_size=7, font_name='Courier New', multiline=True,
+                                           width=self.width - 20, anchor_y='top',
+                                           batch=self.batch, group=self.grp_label)
+        if self.debug.text != text:
+            self.debug.text = text
+
     def on_draw(self):
         """Draws the interface.
 
@@ -121,15 +194,17 @@ class Window(pyglet.window.Window):
 
         The buttons are saved as constants in pyglet.window.mouse,
         the modifiers under pyglet.window.key
-        """
-        self.update()
 
+        The view is not redrawn here, the controller pushes the changed
+        fields (receive_changes). New Game works after the end of a game and
+        while the computer thinks (the computation is cancelled).
+        """
         if button == pyglet.window.mouse.LEFT:
             pos = self.grid.get_indices(mousex, mousey)
 
             if (mousex, mousey) in self.button_pass:
                 self.controller.passing()
-            elif (mousex, mousey) in self.button_newgame and self.data['game_over']:
+            elif (mousex, mousey) in self.button_newgame and (self.data['game_over'] or self.controller.busy):
                 self.controller.new_game()
             elif pos is not None:
                 if self.data['game_over']:
@@ -152,47 +227,42 @@ class Window(pyglet.window.Window):
         if self.data['size'] != self.grid.size:
             self.init_display()
 
-        self.batch_stones = pyglet.graphics.Batch()
-        self.stones_sprites = []
-        self.score_black.text = str(self.data['score'][0])
-        self.score_white.text = str(self.data['score'][1])
+        self._update_labels()
 
-        for i in range(self.data['size']):
-            for j in range(self.data['size']):
-
-                color = self.data['stones'][j][i]
-                x, y = self.grid.get_coords(i, j)
-
-                if color == BLACK:
-                    img_stone = self.image_black_stone
-                    _s = Sprite(img_stone, x=x, y=y, batch=self.batch_stones, group=self.grp_stones)
-                    _s.scale = 1. / 3
-                    self.stones_sprites.append(_s)
-                elif color == WHITE:
-                    img_stone = self.image_white_stone
-                    _s = Sprite(img_stone, x=x, y=y, batch=self.batch_stones, group=self.grp_stones)
-                    _s.scale = 1. / 3
-                    self.stones_sprites.append(_s)
-
-        self.img_turn = {None: self.image_black_stone, True: self.image_black_stone, False: self.image_white_stone}
-        self.img_turn_updated = Sprite(self.img_turn[self.data['color']], x=620, y=655,
-                                       batch=self.batch, group=self.grp_label)
-        self.img_turn_updated.scale = 1./4
-
-        if self.data['game_over']:
+        for j in range(self.data['size']):
             for i in range(self.data['size']):
-                for j in range(self.data['size']):
+                self._update_field(i, j)
 
-                    color = self.data['territory'][j][i]
-                    x, y = self.grid.get_coords(i, j)
+    def _update_labels(self):
+        """Updates the scores and the turn indicator if they changed."""
+        for label, score in ((self.score_black, self.data['score'][0]), (self.score_white, self.data['score'][1])):
+            if label.text != str(score):
+                label.text = str(score)
 
-                    if color == BLACK:
-                        _s = Circle(x=x, y=y, color=(0, 0, 0, 255), r=5, batch=self.batch_stones,
-                                    group=self.grp_territory)
+        image = self.img_turn[self.data['color']]
+        if self.img_turn_updated.image is not image:
+            self.img_turn_updated.image = image
 
-                        self.stones_sprites.append(_s)
-                    if color == WHITE:
-                        _s = Circle(x=x, y=y, color=(255, 255, 255, 255), r=5, batch=self.batch_stones,
-                                    group=self.grp_territory)
-
-                        self.stones_sprites.append(_s)
+    def _update_field(self, i, j):
+        """Updates the stone sprite and the territory marker of the field (i, j)
+        if they differ from self.data.
+        """
+        color = self.data['stones'][j][i]
+        if color != self.shown_stones[j][i]:
+            sprite = self.stones_sprites[j][i]
+            if color is None:
+                sprite.visible = False
+            else:
+                sprite.image = self.image_black_stone if color == BLACK else self.image_white_stone
+                sprite.visible = True
+            self.shown_stones[j][i] = color
+
+        color = self.data['territory'][j][i] if self.data['game_over'] else None
+        if color != self.shown_territory[j][i]:
+            marker = self.territory_markers[j][i]
+            if color is None:
+                marker.visible = False
+            else:
+                marker.color = (0, 0, 0, 255) if color == BLACK else (255, 255, 255, 255)
+                marker.visible = True
+            self.shown_territory[j][i] = color
@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """ This document contains the game's controller. It receives and passes data on between the view and the model.
+
+    The controller does not depend on a user interface. The view is a pluggable front-end:
+    client.Window (pyglet GUI) or headless.HeadlessView (no display). pyglet is only imported
+    when the GUI is used.
+
+    With a background.Background the computer moves and the automatic scoring run in a
+    thread or process pool. The GUI polls the results with pyglet.clock.schedule_interval
+    (see poll), so the window keeps drawing while they are computed.
 """
 
-from client import Window
+from background import genmove
 from game_model import Model
-import pyglet
+from geometry import check_size
 
 BLACK = True
 WHITE = False
@@ -13,53 +21,162 @@ WHITE = False
 class Controller:
     '''In this class the controler of the Go game is defined.'''
 
-    def __init__(self):
+    def __init__(self, ai=None, ai_color=WHITE, view=None, background=None, score_playouts=0, size=9):
         """This method creates an object of the class controler.
 
-               creates Variables:
-                   self.window: calls the class Window with the attributes n and controller.
-
-                        Attributes:
-                            n: defines the size of the board game.
-                            controller: gives attribute self (>c) to the window.
+               Arguments:
+                   ai: optional computer player with a genmove(model) method (e.g. mcts.MCTSPlayer),
+                       None if both players are human.
+                   ai_color: the color the computer player plays.
+                   view: the front-end, an object with the methods receive_data(data),
+                       receive_changes(changes) and show_message(text), e.g. client.Window.
+                       A headless.HeadlessView by default.
+                   background: a background.Background for the computer moves and the scoring,
+                       None to compute them at once (the caller waits).
+                   score_playouts: if not 0, the dead stones are found with that many random
+                       playouts when the game is over (ownership.py), otherwise the territory
+                       is only marked by hand.
+                   size: the size of the board (5 to 25), the view adapts to it.
 
+               creates Variables:
+                   self.view: the front-end, its attribute controller is set to self.
+                   self.size: the size of the board of every game.
                     self.model: calls the class Model.
 
                Variables updated by this method:
                    self.update_window()
                """
-        self.window = Window(n=9, controller=self)
-        self.model = Model()
+        self.size = check_size(size)
+        self.ai = ai
+        self.ai_color = ai_color
+        self.background = background
+        self.score_playouts = score_playouts
+        self.progress = None
+        self.version = None
+        self.instrumentation = None
+        if view is None:
+            from headless import HeadlessView
+            view = HeadlessView()
+        self.view = view
+        self.view.controller = self
+        self.model = Model(self.size)
         self.update_window()
+        self.ai_move()
 
     def new_game(self):
         """This method creates a new game.
 
                creates Variables:
                     self.model: calls the class Model.
-                    self.window.info.text: prints out a message to the user.
+                    self.view.show_message(): prints out a message to the user.
 
                calls methods:
+                    self.background.cancel(): drops the work for the old game.
                     self.update_window(): it calls the method update_window out of the controller class.
                """
-        self.model = Model()
+        if self.background is not None:
+            self.background.cancel()
+        self.model = Model(self.size)
+        self.version = None
+        if self.instrumentation is not None:
+            self._instrument_model()
         self.update_window()
-        self.window.info.text = "It's black's turn"
+        self.view.show_message("It's black's turn")
+        self.ai_move()
+
+    def enable_instrumentation(self, instrumentation=None, overlay=False):
+        """This method measures the time of every phase of a move (see instrument.py).
+
+               Arguments:
+                   instrumentation: an instrument.Instrumentation object (a new one by default).
+                   overlay: shows the timings in the window (refreshed twice per second, GUI only).
+
+               creates Variables:
+                   self.instrumentation: collects the timings of play, passing, mark_territory,
+                        update_window, the model methods and the view updates (window.update
+                        for the changes, window.full_update for a complete redraw).
+
+               Returns:
+                   the instrument.Instrumentation object
+               """
+        from instrument import Instrumentation
+
+        self.instrumentation = instrumentation or Instrumentation()
+        for name in ('play', 'passing', 'mark_territory', 'update_window'):
+            self.instrumentation.wrap(self, name)
+        # receive_changes falls back to receive_data, one phase for both would count that twice
+        self.instrumentation.wrap(self.view, 'receive_changes', 'window.update')
+        self.instrumentation.wrap(self.view, 'receive_data', 'window.full_update')
+        self._instrument_model()
+
+        if overlay:
+            import pyglet
+            # refreshed by the clock so that the overlay does not slow down the measured phases
+            pyglet.clock.schedule_interval(lambda dt: self.view.show_debug(self.instrumentation.dump()), 0.5)
+        return self.instrumentation
+
+    def _instrument_model(self):
+        for name in ('place_stone', 'passing', 'mark_territory', 'get_changes'):
+            self.instrumentation.wrap(self.model, name, 'model.' + name)
+
+    @property
+    def busy(self):
+        """True while a computer move or the scoring runs in the background."""
+        return self.background is not None and self.background.busy
+
+    def _run(self, on_done, fn, *args, label=''):
+        """Runs on_done(fn(*args)) at once or, with a background, when poll finds the result."""
+        if self.background is None:
+            on_done(fn(*args))
+        else:
+            self.background.submit(on_done, fn, *args, label=label)
+            self.progress = None
+            self.poll()
+
+    def poll(self, dt=None):
+        """This method collects the results of the background work and shows what is running.
+
+               Arguments:
+                   dt: ignored, the time since the last call (pyglet.clock.schedule_interval).
+
+               calls methods:
+                   self.background.poll(): calls the callbacks of the finished tasks.
+
+               creates Variables:
+                    self.view.show_message(): shows the running task and its time in tenths of seconds.
+               """
+        if not self.busy:
+            return
+        self.background.poll()
+        task = self.background.task
+        if task is not None:
+            progress = '%s %.1f s' % (task.label, task.elapsed)
+            if progress != self.progress:
+                self.progress = progress
+                self.view.show_message(progress)
+
+    def wait(self):
+        """This method blocks until the background work is done (front-ends without an event loop)."""
+        while self.busy:
+            self.background.wait()
 
     def update_window(self):
-        """This method updates the user window.
+        """This method updates the view with the fields that changed since the last update.
 
                creates Variables:
-                   self.data: calls the get_data method out of the model and returns a data dictionary.
+                   self.data: calls the get_changes method out of the model and returns a data dictionary
+                        with the changes since self.version (all data after a new game).
+                   self.version: the version of the model the view shows.
 
                Variables updated by this method:
-                   self.window.receive_data(self.data): calls the receive_data method out of the window.
+                   self.view.receive_changes(self.data): calls the receive_changes method out of the view.
 
                         Attributes:
                             self.data: a dictionary with data out of the model.
                """
-        self.data = self.model.get_data()
-        self.window.receive_data(self.data)
+        self.data = self.model.get_changes(self.version)
+        self.version = self.data['version']
+        self.view.receive_changes(self.data)
 
     def play(self, pos):
         """This method runs the place_stone method out of the model,
@@ -87,18 +204,21 @@ class Controller:
                    self.data: looks up a key-value pair out of the data dictionary.
 
                creates Variables:
-                    self.window.info.text: prints out a corresponding message to the user.
+                    self.view.show_message(): prints out a corresponding message to the user.
                """
+        if self.busy:
+            return
         posx, posy = pos
 
         if self.model.place_stone(posx, posy):
             self.update_window()
             if self.data["color"] == BLACK:
-                self.window.info.text = "It's black's turn"
+                self.view.show_message("It's black's turn")
             else:
-                self.window.info.text = "It's white's turn"
+                self.view.show_message("It's white's turn")
+            self.ai_move()
         else:
-            self.window.info.text = "Invalid move!"
+            self.view.show_message("Invalid move!")
 
     def passing(self):
         """This method runs the place_stone method out of the model,
@@ -108,23 +228,109 @@ class Controller:
                calls methods:
                    self.model.passing(): calls the method passing() out of the model, which checks if the player has passed.
                    self.update_window(): it calls the method update_window out of the controller class.
+                   self.game_over(): scores the game when both players have passed.
 
                calls Variables:
                    self.data: looks up a key-value pair out of the data dictionary.
 
                creates Variables:
-                    self.window.info.text: prints out a corresponding message to the user.
+                    self.view.show_message(): prints out a corresponding message to the user.
                """
+        if self.busy:
+            return
         if self.model.passing():
             self.update_window()
             if not self.data["game_over"]:
                 if self.data["color"] == BLACK:
-                    self.window.info.text = "It's black's turn"
+                    self.view.show_message("It's black's turn")
                 else:
-                    self.window.info.text = "It's white's turn"
+                    self.view.show_message("It's white's turn")
             else:
-                self.window.info.text = "Game over!"
+                self.game_over()
+            self.ai_move()
+        self.update_window()
+
+    def ai_move(self):
+        """This method lets the computer player move if it is its turn.
+
+               calls methods:
+                   background.genmove(self.ai, model): searches the move of the computer player on a
+                        clone of the model, in the background if there is one.
+                   self._ai_done(result): plays the move.
+
+               creates Variables:
+                    self.view.show_message(): shows that the computer player is thinking.
+               """
+        if self.ai is None or self.model.game_over or self.model.turn != self.ai_color or self.busy:
+            return
+
+        close = self.background is not None and self.background.processes
+        self._run(self._ai_done, genmove, self.ai, self.model.clone(), close, label='AI is thinking...')
+
+    def _ai_done(self, result):
+        """This method plays the move found by the computer player.
+
+               Arguments:
+                   result: the move, the stats and the state of the random generator of the player.
+
+               calls methods:
+                   self.model.place_stone(posx, posy) or self.model.passing(): plays the move.
+                   self.update_window(): it calls the method update_window out of the controller class.
+
+               creates Variables:
+                    self.view.show_message(): prints out the playouts per second of the search.
+               """
+        move, stats, state = result
+        self.ai.stats = stats
+        if state is not None:
+            self.ai.rng.setstate(state)
+
+        if move is None:
+            self.model.passing()
+        else:
+            self.model.place_stone(*move)
+        self.update_window()
+
+        if self.data["game_over"]:
+            self.game_over()
+        else:
+            self.view.show_message("Your turn (AI: %d playouts/s)" % self.ai.stats['playouts_per_sec'])
+
+    def game_over(self):
+        """This method ends the game. With score_playouts the dead stones are found automatically,
+        otherwise the players mark the territory by hand.
+
+               calls methods:
+                   ownership.estimate(model, self.score_playouts): estimates the owner of every field
+                        on a clone of the model, in the background if there is one.
+                   self._score_done(result): marks the territory.
+
+               creates Variables:
+                    self.view.show_message(): prints out a corresponding message to the user.
+               """
+        if not self.score_playouts:
+            self.view.show_message("Game over!")
+            return
+
+        from ownership import estimate
+        self._run(self._score_done, estimate, self.model.clone(), self.score_playouts, label='Scoring...')
+
+    def _score_done(self, result):
+        """This method marks the territory and the dead stones from the estimated ownership.
+
+               Arguments:
+                   result: the ownership and the stats returned by ownership.estimate.
+
+               calls methods:
+                   ownership.mark_ownership(self.model, ownership): updates the territory and the score.
+                   self.update_window(): it calls the method update_window out of the controller class.
+               """
+        from ownership import mark_ownership
+
+        ownership, _ = result
+        dead = mark_ownership(self.model, ownership)
         self.update_window()
+        self.view.show_message("Game over! %d dead groups" % len(dead))
 
     def mark_territory(self, pos):
         """This method calls the mark_territory function of the model.
@@ -147,6 +353,8 @@ class Controller:
 
                     self.update_window(): it calls the method update_window out of the controller class.
                """
+        if self.busy:
+            return
         posx, posy = pos
 
         self.model.mark_territory(posx, posy)
@@ -154,5 +362,59 @@ class Controller:
 
 
 if __name__ == '__main__':
-    c = Controller()
-    pyglet.app.run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Project Go')
+    parser.add_argument('--size', type=int, default=9, help='size of the board (5 to 25)')
+    parser.add_argument('--ai', choices=['black', 'white'], default=None,
+                        help='let the computer play this color')
+    parser.add_argument('--playouts', type=int, default=1000, help='playouts per computer move')
+    parser.add_argument('--seconds', type=float, default=None, help='thinking time per computer move')
+    parser.add_argument('--workers', type=int, default=1, help='processes for the playouts')
+    parser.add_argument('--stats', action='store_true',
+                        help='show the timings of every phase in the window and print them at the end')
+    parser.add_argument('--profile', metavar='PHASE[:CALLS]',
+                        help='run a phase (e.g. model.place_stone) under cProfile for CALLS calls')
+    parser.add_argument('--background', choices=['process', 'thread', 'off'], default='process',
+                        help='where the computer moves and the scoring are computed')
+    parser.add_argument('--score-playouts', type=int, default=0,
+                        help='find the dead stones with that many playouts after the game')
+    parser.add_argument('--headless', action='store_true',
+                        help='play in the terminal without a window (see headless.py)')
+    args = parser.parse_args()
+
+    ai = None
+    if args.ai is not None:
+        from mcts import MCTSPlayer
+        ai = MCTSPlayer(playouts=args.playouts, seconds=args.seconds, workers=args.workers)
+
+    background = None
+    if args.background != 'off':
+        from background import Background
+        background = Background(processes=args.background == 'process')
+
+    if args.headless:
+        import sys
+        from headless import HeadlessView, run
+        view = HeadlessView(out=sys.stdout)
+    else:
+        import pyglet
+        from client import Window
+        view = Window(n=args.size)
+
+    c = Controller(ai=ai, ai_color=args.ai == 'black', view=view, background=background,
+                   score_playouts=args.score_playouts, size=args.size)
+    if args.stats or args.profile:
+        instrumentation = c.enable_instrumentation(overlay=args.stats and not args.headless)
+        if args.profile:
+            phase, _, calls = args.profile.partition(':')
+            instrumentation.profile(phase, int(calls or 100))
+    if args.headless:
+        run(c, sys.stdin)
+    else:
+        pyglet.clock.schedule_interval(c.poll, 1/30)
+        pyglet.app.run()
+    if background is not None:
+        background.close()
+    if args.stats:
+        print(c.instrumentation.dump())
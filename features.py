@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module extracts input planes for move prediction models with NumPy.
+
+A batch of positions becomes an array of shape (B, C, n, n) where
+planes[b, c, y, x] is feature c of the field (x, y) of position b:
+
+    0  black        black stone
+    1  white        white stone
+    2  empty        no stone
+    3  liberties_1  stone of a group with 1 liberty (one plane per count,
+    4  liberties_2  the last one for LIBERTIES or more)
+    5  liberties_3
+    6  liberties_4
+    7  turns_1      stone played 1 turn ago (one plane per turn up to
+    ... turns_8     HISTORY, passes count as turns)
+    15 ko           field forbidden by the (simple) ko rule
+    16 legal        legal move for the player to move
+    17 black_to_move all ones if black is to move
+
+The liberties are taken from Group.liberties, which the Model keeps up
+to date, and the history from Model.moves. The legal moves are derived
+for the whole batch at once from the stone, liberty and ko planes (empty,
+not ko, and not suicide); positional superko is not considered.
+
+iter_batches replays games and yields batches together with the move
+played in each position, without keeping more than one batch in memory:
+
+    for planes, moves in iter_batches(sgf.iter_games('archive.sgf')):
+        train_step(planes, moves)
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from game_model import Model
+
+BLACK = True
+WHITE = False
+
+LIBERTIES = 4
+HISTORY = 8
+
+CHANNELS = (('black', 'white', 'empty')
+            + tuple('liberties_%d' % k for k in range(1, LIBERTIES + 1))
+            + tuple('turns_%d' % k for k in range(1, HISTORY + 1))
+            + ('ko', 'legal', 'black_to_move'))
+
+BLACK_PLANE = CHANNELS.index('black')
+WHITE_PLANE = CHANNELS.index('white')
+EMPTY_PLANE = CHANNELS.index('empty')
+LIBERTY_PLANE = CHANNELS.index('liberties_1')
+HISTORY_PLANE = CHANNELS.index('turns_1')
+KO_PLANE = CHANNELS.index('ko')
+LEGAL_PLANE = CHANNELS.index('legal')
+TURN_PLANE = CHANNELS.index('black_to_move')
+
+
+def _fill(planes, model):
+    """Writes the stone, liberty, history, ko and turn planes of one position.
+
+    Arguments:
+        planes (np.ndarray): zeroed (C, n, n) array
+        model (Model)      : the position
+    """
+    n = model.size
+    flat = planes.reshape(len(CHANNELS), n * n)
+    board = model.board
+
+    groups = set(board)
+    groups.discard(None)
+    # collected for all groups so that numpy is called only once
+    channels = []
+    points = []
+    for grp in groups:
+        size = len(grp.stones)
+        points += list(grp.stones) * 2
+        channels += [BLACK_PLANE if grp.color == BLACK else WHITE_PLANE] * size
+        channels += [LIBERTY_PLANE + min(len(grp.liberties), LIBERTIES) - 1] * size
+    flat[channels, points] = 1
+
+    marked = set()
+    for k, move in enumerate(model.moves[:-HISTORY - 1:-1]):
+        if move.pos is None:
+            continue
+        x, y = move.pos
+        p = y * n + x
+        if board[p] is not None and p not in marked:
+            flat[HISTORY_PLANE + k, p] = 1
+            marked.add(p)
+
+    if model.blocked_field is not None:
+        x, y = model.blocked_field
+        flat[KO_PLANE, y * n + x] = 1
+    if model.turn == BLACK:
+        flat[TURN_PLANE] = 1
+
+
+def _adjacent(mask):
+    """Marks the fields that have a True neighbour in the (B, n, n) mask."""
+    out = np.zeros_like(mask)
+    out[:, 1:, :] |= mask[:, :-1, :]
+    out[:, :-1, :] |= mask[:, 1:, :]
+    out[:, :, 1:] |= mask[:, :, :-1]
+    out[:, :, :-1] |= mask[:, :, 1:]
+    return out
+
+
+def _finish(planes, game_over):
+    """Computes the empty and legal planes of the whole batch.
+
+    A move on an empty field that is not the ko point is legal if the
+    field has an empty neighbour, a friendly neighbour group with more
+    than one liberty or an enemy neighbour group in atari.
+    """
+    black = planes[:, BLACK_PLANE] > 0
+    white = planes[:, WHITE_PLANE] > 0
+    empty = ~(black | white)
+    to_black = planes[:, TURN_PLANE, :1, :1] > 0
+
+    own = np.where(to_black, black, white)
+    enemy = np.where(to_black, white, black)
+    atari = planes[:, LIBERTY_PLANE] > 0
+
+    legal = empty & _adjacent(empty | (own & ~atari) | (enemy & atari))
+    legal &= ~(planes[:, KO_PLANE] > 0)
+    legal[game_over] = False
+
+    planes[:, EMPTY_PLANE] = empty
+    planes[:, LEGAL_PLANE] = legal
+
+
+def extract(models, dtype=np.float32):
+    """Builds the input planes of several positions of the same size.
+
+    Arguments:
+        models (list)   : Model objects
+        dtype           : type of the array (e.g. np.uint8 to save memory)
+
+    Returns:
+        (np.ndarray): array of shape (B, C, n, n), see CHANNELS
+    """
+    n = models[0].size
+    planes = np.zeros((len(models), len(CHANNELS), n, n), dtype=dtype)
+    for b, model in enumerate(models):
+        _fill(planes[b], model)
+    _finish(planes, np.array([model.game_over for model in models], dtype=bool))
+    return planes
+
+
+def iter_batches(games, batch_size=256, dtype=np.float32):
+    """Replays games and yields the planes of every position before a move.
+
+    Arguments:
+        games (iterable): dicts with 'size' and 'moves' [(color, (x, y) or None)],
+                          e.g. from sgf.iter_games (setup stones are placed first)
+        batch_size (int): positions per batch, the last batch may be smaller
+        dtype           : type of the planes
+
+    Yields:
+        (tuple): planes (B, C, n, n) and the moves played in these positions
+                 (int64 array, y * n + x or n * n for a pass). A new batch is
+                 started when the board size changes.
+    """
+    planes = moves = None
+    b = 0
+    game_over = np.zeros(batch_size, dtype=bool)
+
+    for game in games:
+        n = game['size']
+        if planes is not None and planes.shape[-1] != n:
+            if b:
+                _finish(planes[:b], game_over[:b])
+                yield planes[:b], moves[:b]
+            planes = None
+
+        model = Model(n)
+        for color, pos in game.get('setup', ()):
+            if pos is not None:
+                model.turn = color
+                model.place_stone(*pos)
+
+        for color, pos in game['moves']:
+            model.turn = color
+            if planes is None:
+                planes = np.zeros((batch_size, len(CHANNELS), n, n), dtype=dtype)
+                moves = np.empty(batch_size, dtype=np.int64)
+                b = 0
+
+            _fill(planes[b], model)
+            game_over[b] = model.game_over
+            if pos is None:
+                legal = model.passing()
+                moves[b] = n * n
+            else:
+                legal = model.place_stone(*pos)
+                moves[b] = pos[1] * n + pos[0]
+            if not legal:  # the position is not a training example
+                planes[b] = 0
+                continue
+
+            b += 1
+            if b == batch_size:
+                _finish(planes, game_over)
+                yield planes, moves
+                planes = None
+
+    if planes is not None and b:
+        _finish(planes[:b], game_over[:b])
+        yield planes[:b], moves[:b]
+
+
+def main():
+    from simulate import play_game
+
+    parser = argparse.ArgumentParser(description='Measures the feature extraction.')
+    parser.add_argument('files', nargs='*', help='SGF files (default: random games)')
+    parser.add_argument('--games', type=int, default=100, help='number of random games')
+    parser.add_argument('--size', type=int, default=19)
+    parser.add_argument('--batch', type=int, default=256)
+    args = parser.parse_args()
+
+    if args.files:
+        import sgf
+        # streamed: the files are read while the batches are built (and timed)
+        games = (game for source in args.files for game in sgf.iter_games(source))
+    else:
+        games = [{'size': args.size, 'moves': [(move.color, move.pos) for move in play_game(args.size, seed=i)[0].moves]}
+                 for i in range(args.games)]
+
+    positions = 0
+    start = time.perf_counter()
+    for planes, _ in iter_batches(games, args.batch):
+        positions += len(planes)
+    seconds = time.perf_counter() - start
+    print('%d positions, %d planes: %.0f positions/s (%.2f s)' % (
+        positions, len(CHANNELS), positions / seconds, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,30 +3,93 @@
 """ This document contains the game's model. In here the games logic and tests are implemented.
 """
 
+import copy
+import random
+from collections import namedtuple
+
+from geometry import check_size, coordinate_table, neighbour_table
 from template import Group, Terr_Template
 
 BLACK = True
 WHITE = False
 
+_ZOBRIST = {}
+
+
+def zobrist_keys(n):
+    """Returns the Zobrist keys for a board of size n.
+
+    The keys are drawn from a fixed seed, so the hash of a position is the
+    same in every process and can be stored alongside game records.
+
+    Arguments:
+        n (int): size of the board
+
+    Returns:
+        (2d list): 64 bit keys indexed by [y * n + x][color]
+    """
+    if n not in _ZOBRIST:
+        rng = random.Random(n)
+        _ZOBRIST[n] = [(rng.getrandbits(64), rng.getrandbits(64)) for _ in range(n * n)]
+    return _ZOBRIST[n]
+
+# Everything that is needed to take back a move. For a pass pos and group are None.
+#   pos         : (x, y) of the placed stone
+#   color       : color of the player who moved
+#   group       : the new group containing the placed stone
+#   merged      : groups of the same color that were merged into the new group
+#   killed      : captured groups
+#   neighbours  : enemy groups that lost pos as a liberty
+#   blocked_field, has_passed, game_over : the values before the move
+Move = namedtuple('Move', ['pos', 'color', 'group', 'merged', 'killed', 'neighbours',
+                           'blocked_field', 'has_passed', 'game_over'])
+
+
 class Model(Terr_Template):
 
-    def __init__(self, n=11):
+    def __init__(self, n=11, superko=False, history=True):
         """
         Initialises Game attributes.
+
+        Arguments:
+            n (int)        : size of the board (see geometry.check_size)
+            superko (bool) : forbid every move that repeats an earlier position
+                             (positional superko) instead of only the simple ko
+            history (bool) : keep the Move records for undo and redo; without
+                             them Model.moves stays empty and undo returns False
         """
         # Gameplay attributes
-        self.size = n  # size of board (int)
+        self.size = check_size(n)  # size of board (int)
         self.turn = BLACK
         self.blocked_field = None  # Ko-rule
+        self.superko = superko
         self.has_passed = False
         self.game_over = False
 
-        self.board = [[None for _ in range(self.size)] for _ in range(self.size)]
+        # board[y * n + x] holds the Group on the field (x, y) or None
+        self.board = [None] * (n * n)
+        self.neighbours = neighbour_table(n)
+        self.coords = coordinate_table(n)
         self.territory = [[None for _ in range(self.size)] for _ in range(self.size)]
 
         self.score = [0, 0]
         self.captured = [0, 0]
 
+        # Zobrist hash of the stones on the board
+        self.keys = zobrist_keys(self.size)
+        self.hash = 0
+        self.seen = {self.hash}  # positions played so far (superko)
+
+        self.history = history
+        self.moves = []  # Move records of the game so far (undo)
+        self.undone = []  # Move records that were taken back (redo)
+
+        # Change feed: (version, y * n + x) of every field whose stone or territory
+        # changed. It holds all changes after version changes_since.
+        self.version = 0
+        self.changes = []
+        self.changes_since = 0
+
     def passing(self):
         """Checks if player has passed and changes the respective attributes accordingly.
 
@@ -36,13 +99,19 @@ class Model(Terr_Template):
         if self.game_over:
             return False
 
+        if self.history:
+            self.moves.append(Move(None, self.turn, None, (), (), (),
+                                   self.blocked_field, self.has_passed, self.game_over))
+            del self.undone[:]
+
         if not self.has_passed:
             self.turn = not self.turn
             self.blocked_field = None
             self.has_passed = True
-            return True
+        else:
+            self.game_over = True
 
-        self.game_over = True
+        self._commit()
         return True
 
     def _stones(self):
@@ -52,14 +121,9 @@ class Model(Terr_Template):
         Returns:
             (2d list): color of stones (shape of self.board)
         """
-        stones = [[None for _ in range(self.size)] for _ in range(self.size)]
-        for i in range(len(self.board)):
-            for j in range(len(self.board)):
-                if self.board[j][i] is None:
-                    stones[j][i] = None
-                else:
-                    stones[j][i] = self.board[j][i].color
-        return stones
+        n = self.size
+        colors = [None if grp is None else grp.color for grp in self.board]
+        return [colors[j * n:(j + 1) * n] for j in range(n)]
 
     def get_data(self):
         """Prepares data for the GUI.
@@ -77,14 +141,77 @@ class Model(Terr_Template):
         }
         return data
 
+    def _touch(self, p):
+        """Records that the field p (y * size + x) changed in the upcoming version."""
+        self.changes.append((self.version + 1, p))
+
+    def _commit(self):
+        """Closes the current version of the change feed. The oldest entries
+        are dropped once the feed is longer than 4 * size * size.
+        """
+        self.version += 1
+        limit = 4 * self.size * self.size
+        if len(self.changes) > limit:
+            drop = len(self.changes) - limit // 2
+            self.changes_since = self.changes[drop - 1][0]
+            del self.changes[:drop]
+
+    def _set_territory(self, x, y, color):
+        if self.territory[y][x] != color:
+            self.territory[y][x] = color
+            self._touch(y * self.size + x)
+
+    def get_changes(self, since=None):
+        """Prepares the data that changed after version since for the GUI.
+
+        Arguments:
+            since (int): version the receiver has already seen, None for all data
+
+        Returns:
+            (dict): version, full (bool) and the same keys as get_data. If full
+                    is False, 'stones' and 'territory' are dicts {(x, y): color}
+                    that only contain the fields changed after since, otherwise
+                    they are complete 2d lists (see get_data).
+        """
+        if since is None or since < self.changes_since or since > self.version:
+            data = self.get_data()
+            data['version'] = self.version
+            data['full'] = True
+            return data
+
+        stones = {}
+        territory = {}
+        coords = self.coords
+        for version, p in reversed(self.changes):
+            if version <= since:
+                break
+            pos = coords[p]
+            if pos not in stones:
+                grp = self.board[p]
+                stones[pos] = None if grp is None else grp.color
+                territory[pos] = self.territory[pos[1]][pos[0]]
+
+        return {
+            'version': self.version,
+            'full': False,
+            'size': self.size,
+            'stones': stones,
+            'territory': territory,
+            'game_over': self.game_over,
+            'score': (self.score[0] + self.captured[0], self.score[1] + self.captured[1]),
+            'color': self.turn
+        }
+
     def _add(self, grp):
         """Iterates over group of stones and adds coordinate tuple to the board.
+        The hash is not changed (see _next_hash).
 
         Arguments:
             grp (Group): A group of stones
         """
-        for i, j in grp.stones:
-            self.board[j][i] = grp
+        board = self.board
+        for p in grp.stones:
+            board[p] = grp
 
     def _remove(self, grp):
         """Iterates over group of stones and sets the corresponding coordinates of the board to None.
@@ -92,12 +219,14 @@ class Model(Terr_Template):
         Arguments:
             grp (Group): A group of stones
         """
-        for i, j in grp.stones:
-            self.board[j][i] = None
+        board = self.board
+        for p in grp.stones:
+            board[p] = None
 
     def _kill(self, grp):
         """Removes a group of stones from the game and increases the counter of
-        captured stones.
+        captured stones. The fields of the killed group become liberties of
+        the adjacent groups.
 
         Arguments:
             grp (Group): The group that should be killed
@@ -105,11 +234,19 @@ class Model(Terr_Template):
         Attributes updated by this function:
             self.board
             self.captured
-            self.group
+            liberties of the adjacent groups
         """
         self.captured[not grp.color] += grp.size
         self._remove(grp)
 
+        board = self.board
+        neighbours = self.neighbours
+        for p in grp.stones:
+            self._touch(p)
+            for q in neighbours[p]:
+                if board[q] is not None:
+                    board[q].liberties.add(p)
+
     def _liberties(self, grp):
         """ Counts the number of empty fields adjacent to the group.
 
@@ -119,11 +256,27 @@ class Model(Terr_Template):
             Returns:
                 (int)       : nr. of liberties of that group
         """
-        count = 0
-        for i in grp.border:
-            if self.board[i[1]][i[0]] is None:
-                count += 1
-        return count
+        return len(grp.liberties)
+
+    def _next_hash(self, p, captured):
+        """Computes the hash of the position after placing a stone on the field p.
+        The hash only changes for the new stone and the captured stones, the
+        stones of merged groups stay where they are. Applied again to the
+        resulting position it gives the hash before the move (undo).
+
+        Arguments:
+            p (int)         : field y * n + x
+            captured (list) : the groups that get captured
+
+        Returns:
+            (int): Zobrist hash of the resulting position
+        """
+        keys = self.keys
+        h = self.hash ^ keys[p][self.turn]
+        for grp in captured:
+            for q in grp.stones:
+                h ^= keys[q][grp.color]
+        return h
 
     def place_stone(self, x, y):
         """ Checks the validity of the stone to be placed.
@@ -132,67 +285,251 @@ class Model(Terr_Template):
                 x       : x-coordinate of stone to place
                 y       : y-coordinate of stone to place
             Return:
-                (bool)  : True if move is valid, False otherwise.
+                (bool)  : True if move is valid, False otherwise (also for a
+                          field outside the board).
         """
-        if self.blocked_field == (x, y):
+        if self.game_over:
             return False
 
-        if self.game_over:
+        n = self.size
+        if not (0 <= x < n and 0 <= y < n):
             return False
-        if self.board[y][x] is not None:
+        p = y * n + x
+        board = self.board
+        if board[p] is not None or self.blocked_field == self.coords[p]:
             return False
 
-        new = Group(stones=[(x, y)], color=self.turn)
+        color = self.turn
+        new = Group((p,), color)
+        liberties = new.liberties
 
         groups_to_remove = []
-        self.groups_to_kill = []
+        neighbouring_groups = []
+        for q in self.neighbours[p]:
+            other = board[q]
+            if other is None:
+                liberties.add(q)
+            elif other.color == color:
+                if other not in groups_to_remove:
+                    groups_to_remove.append(other)
+            elif other not in neighbouring_groups:
+                neighbouring_groups.append(other)
+
+        # the merged group is built in place instead of adding the groups one by one
+        for other in groups_to_remove:
+            new.stones |= other.stones
+            liberties |= other.liberties
+        liberties.discard(p)
+
+        self.groups_to_kill = [other for other in neighbouring_groups if len(other.liberties) == 1]
+
+        if not liberties and not self.groups_to_kill:
+            return False  # suicide
+
+        next_hash = self._next_hash(p, self.groups_to_kill)
+        if self.superko and next_hash in self.seen:
+            return False
 
-        neighbouring_stones = ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+        neighbouring_groups = tuple(other for other in neighbouring_groups if len(other.liberties) > 1)
 
-        is_valid = False
-        n = self.size
+        for i in groups_to_remove:
+            self._remove(i)
+        self._add(new)
+        for i in neighbouring_groups:
+            i.liberties.discard(p)
+        for i in self.groups_to_kill:
+            self._kill(i)
+        self.hash = next_hash
 
-        for neighbour in neighbouring_stones:
-            u, v = neighbour
-            if u in range(n) and v in range(n):
-                new.border.add(neighbour)
-            else:
-                continue
-            other = self.board[v][u]
+        if self.history:
+            self.moves.append(Move(self.coords[p], color, new, tuple(groups_to_remove), tuple(self.groups_to_kill),
+                                   neighbouring_groups, self.blocked_field, self.has_passed, self.game_over))
+            if self.undone:
+                del self.undone[:]
 
-            if other is None:
-                is_valid = True
-            elif other.color == new.color:
-                groups_to_remove.append(other)
-                new = new + other
-            elif self._liberties(other) == 1:
-                is_valid = True
-                self.groups_to_kill.append(other)
-
-        if self._liberties(new):
-            is_valid = True
-
-        if is_valid:
-            set_to_kill = set()
-            set_to_remove = set()
-
-            for i in self.groups_to_kill:
-                set_to_kill.add(i)
-            for i in groups_to_remove:
-                set_to_remove.add(i)
-            for i in set_to_kill:
-                self._kill(i)
-            for i in set_to_remove:
-                self._remove(i)
-
-            self._add(new)
-            self.has_passed = False
-            self.turn = not self.turn
+        self.has_passed = False
+        self.turn = not color
+        if self.superko:
+            self.seen.add(self.hash)
 
-        if len(new.stones) == 1 and len(self.groups_to_kill) == 1:
-            for stone_block in self.groups_to_kill:
-                self.blocked_field = next(iter(stone_block.stones))
+        if len(new.stones) == 1 and len(self.groups_to_kill) == 1 and self.groups_to_kill[0].size == 1:
+            self.blocked_field = self.coords[next(iter(self.groups_to_kill[0].stones))]
         else:
             self.blocked_field = None
 
+        self._touch(p)
+        self._commit()
         return True
+
+    def is_legal(self, x, y):
+        """ Checks if a stone of the player to move could be placed on (x, y).
+            The same rules as in place_stone are checked without placing the
+            stone, so the board, the history and the change feed are not touched.
+
+            Arguments:
+                x, y (int): coordinates of the field
+            Return:
+                (bool)  : True if the move is valid, False otherwise.
+        """
+        if self.game_over:
+            return False
+
+        n = self.size
+        if not (0 <= x < n and 0 <= y < n):
+            return False
+        p = y * n + x
+        board = self.board
+        if board[p] is not None or self.blocked_field == self.coords[p]:
+            return False
+
+        color = self.turn
+        free = False  # the new group keeps a liberty
+        captured = []
+        for q in self.neighbours[p]:
+            other = board[q]
+            if other is None:
+                free = True
+            elif other.color == color:
+                if len(other.liberties) > 1:
+                    free = True
+            elif len(other.liberties) == 1 and other not in captured:
+                captured.append(other)
+
+        if not free and not captured:
+            return False  # suicide
+        return not (self.superko and self._next_hash(p, captured) in self.seen)
+
+    def find_territory(self):
+        Terr_Template.find_territory(self)
+        self._commit()
+
+    def mark_territory(self, x, y):
+        Terr_Template.mark_territory(self, x, y)
+        self._commit()
+
+    def _revive(self, grp):
+        """Puts a killed group back on the board (inverse of _kill).
+
+        Arguments:
+            grp (Group): The group that was killed
+        """
+        self.captured[not grp.color] -= grp.size
+        self._add(grp)
+
+        board = self.board
+        neighbours = self.neighbours
+        for p in grp.stones:
+            self._touch(p)
+            for q in neighbours[p]:
+                if board[q] is not None:
+                    board[q].liberties.discard(p)
+
+    def undo(self):
+        """Takes back the last move or pass. Only the fields that changed
+        with that move are touched.
+
+        Returns:
+            (bool): True if a move was taken back, False if there is none
+
+        Attributes updated by this function:
+            self.board
+            self.captured
+            self.hash
+            self.moves
+            self.undone
+            self.version
+            turn, ko and pass state
+        """
+        if not self.moves:
+            return False
+        move = self.moves.pop()
+
+        if move.pos is None:
+            if self.game_over and not move.game_over:
+                # the territory is only marked after the game has ended
+                for y in range(self.size):
+                    for x in range(self.size):
+                        self._set_territory(x, y, None)
+                self.score = [0, 0]
+        else:
+            if self.superko:
+                self.seen.discard(self.hash)
+            x, y = move.pos
+            p = y * self.size + x
+            self.turn = move.color
+            self.hash = self._next_hash(p, move.killed)
+            self._remove(move.group)
+            for grp in move.merged:
+                self._add(grp)
+            for grp in move.killed:
+                self._revive(grp)
+            for grp in move.neighbours:
+                grp.liberties.add(p)
+            self._touch(p)
+
+        self.turn = move.color
+        self.blocked_field = move.blocked_field
+        self.has_passed = move.has_passed
+        self.game_over = move.game_over
+
+        self.undone.append(move)
+        self._commit()
+        return True
+
+    def redo(self):
+        """Plays the last move that was taken back by undo again.
+
+        Returns:
+            (bool): True if a move was replayed, False if there is none
+        """
+        if not self.undone:
+            return False
+        move = self.undone.pop()
+        undone = self.undone
+        self.undone = []
+
+        if move.pos is None:
+            self.passing()
+        else:
+            self.place_stone(*move.pos)
+
+        self.undone = undone
+        return True
+
+    def clone(self):
+        """Creates an independent copy of the game for search or analysis.
+
+        The stones sets of the groups are never changed once a
+        group is on the board, so they are shared with the copy; only the
+        board, the liberties and the counters are copied. The clone starts
+        without move history, undo stops at the position it was created from.
+        Methods that were wrapped on the instance (instrument.py,
+        transposition.py) are not copied.
+
+        Returns:
+            (Model): copy of the game
+        """
+        other = copy.copy(self)
+        # a wrapper would still call the method of self and time or cache it for self
+        for name, value in list(vars(other).items()):
+            if hasattr(value, '__wrapped__'):
+                del vars(other)[name]
+        groups = {}
+        board = []
+        for grp in self.board:
+            if grp is not None:
+                if grp not in groups:
+                    groups[grp] = grp.copy()
+                grp = groups[grp]
+            board.append(grp)
+
+        other.board = board
+        other.territory = [row[:] for row in self.territory]
+        other.score = self.score[:]
+        other.captured = self.captured[:]
+        other.seen = set(self.seen)
+        other.moves = []
+        other.undone = []
+        other.changes = []
+        other.changes_since = self.version
+        return other
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains tables that only depend on the size of the board.
+
+The fields of an n x n board are numbered p = y * n + x. The tables are
+computed once per size and shared by all games (and views) of that size,
+so the rules engine never has to check whether a neighbour is on the
+board. Sizes from MIN_SIZE to MAX_SIZE are supported.
+"""
+
+from functools import lru_cache
+
+MIN_SIZE = 5
+MAX_SIZE = 25
+
+
+def check_size(n):
+    """Checks that a board of size n is supported.
+
+    Arguments:
+        n (int): size of the board
+
+    Returns:
+        (int): n
+
+    Raises:
+        ValueError: if n is not an int from MIN_SIZE to MAX_SIZE
+    """
+    if not isinstance(n, int) or not MIN_SIZE <= n <= MAX_SIZE:
+        raise ValueError('size must be between %d and %d' % (MIN_SIZE, MAX_SIZE))
+    return n
+
+
+@lru_cache(maxsize=None)
+def neighbour_table(n):
+    """Returns the neighbours of every field.
+
+    Arguments:
+        n (int): size of the board
+
+    Returns:
+        (tuple): for every field p the tuple of its 2 to 4 neighbours
+    """
+    table = []
+    for y in range(n):
+        for x in range(n):
+            table.append(tuple(v * n + u for u, v in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                               if 0 <= u < n and 0 <= v < n))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def coordinate_table(n):
+    """Returns the coordinates of every field.
+
+    Arguments:
+        n (int): size of the board
+
+    Returns:
+        (tuple): (x, y) of every field p, the tuples are shared
+    """
+    return tuple((x, y) for y in range(n) for x in range(n))
+
+
+@lru_cache(maxsize=None)
+def edge_masks(n):
+    """Returns the bit masks of a bitboard (bit p is the field p).
+
+    Arguments:
+        n (int): size of the board
+
+    Returns:
+        (tuple): full board, all fields but the left column, all fields but
+                 the right column
+    """
+    full = (1 << (n * n)) - 1
+    left = 0
+    for y in range(n):
+        left |= 1 << (y * n)
+    right = left << (n - 1)
+    return full, full & ~left, full & ~right
+
+
+@lru_cache(maxsize=None)
+def star_points(n):
+    """Returns the star points (hoshi) of the board.
+
+    From 7x7 on the corner points are on the 3rd line (4th line from
+    13x13 on). Odd boards from 9x9 on have a center point, from 15x15 on
+    also the points on the middle of the sides.
+
+    Arguments:
+        n (int): size of the board
+
+    Returns:
+        (tuple): (x, y) of the star points
+    """
+    if n < 7:
+        return ()
+    a = 3 if n >= 13 else 2
+    b = n - 1 - a
+    points = [(a, a), (a, b), (b, b), (b, a)]
+    if n % 2 == 1:
+        c = n // 2
+        if n >= 9:
+            points.append((c, c))
+        if n >= 15:
+            points += [(a, c), (c, b), (b, c), (c, a)]
+    return tuple(points)
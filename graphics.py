@@ -7,6 +7,9 @@ Buttons, Disks and the Go Grid to use them in Pyglet.
 
 import pyglet
 import math
+from functools import lru_cache
+
+from geometry import star_points
 
 class Button:
     """Simple implementation of a button in pyglet.
@@ -132,31 +135,17 @@ class Grid:
         else:
             self.x0 = x - width // 2
 
-        pos = sum([[self.x0 + (i // 2) * self.field_width, self.y0 + (i % 2) * height] for i in range(2 * n)] +
-                  [[self.x0 + (i % 2) * width, self.y0 + (i // 2) * self.field_height] for i in range(2 * n)], [])
-
-        batch.add(4 * n, pyglet.gl.GL_LINES, group, ('v2f', pos),
-                  ('c4f', sum([list(col) for _ in range(4 * n)], [])))
-
-        if n >= 7:
-            if n >= 13:
-                q = 1
-            else:
-                q = 0
+        pos = []
+        for i in range(n):
+            u = self.x0 + i * self.field_width
+            v = self.y0 + i * self.field_height
+            pos.extend((u, self.y0, u, self.y0 + height))  # vertical line
+            pos.extend((self.x0, v, self.x0 + width, v))  # horizontal line
 
-            points = [(self.x0 + i * self.field_width, self.y0 + j * self.field_height)
-                      for i, j in [(2 + q, 2 + q), (2 + q, n - 3 - q), (n - 3 - q, n - 3 - q),
-                                   (n - 3 - q, 2 + q)]]
+        batch.add(4 * n, pyglet.gl.GL_LINES, group, ('v2f', pos), ('c4f', col * (4 * n)))
 
-            if n % 2 == 1:
-                if n >= 9:
-                    points.append((self.x0 + (n // 2) * self.field_width, self.y0 + (n // 2) * self.field_height))
-                if n >= 15:
-                    points += [(self.x0 + i * width / (n - 1), self.y0 + j * height / (n - 1))
-                               for i, j in [(2 + q, n // 2), (n // 2, n - 3 - q), (n - 3 - q, n // 2), (n // 2, 2 + q)]]
-
-            for u, v in points:
-                Circle(u, v, r=3, n=32, color=color, batch=batch, group=group)
+        for i, j in star_points(n):
+            Circle(*self.get_coords(i, j), r=3, n=32, color=color, batch=batch, group=group)
 
     def get_indices(self, x, y):
         i_x = int(round((x - self.x0) / self.field_width))
@@ -176,21 +165,77 @@ class Grid:
     def field_height(self):
         return self.height / (self.size - 1.)
 
+@lru_cache(maxsize=None)
+def _circle_offsets(r, n):
+    """Vertex offsets of a disk with radius r around (0, 0) made of n + 1
+    triangles, flattened to [dx0, dy0, dx1, dy1, ...].
+    """
+    points = [(r * math.cos(i * 2 * math.pi / n), r * math.sin(i * 2 * math.pi / n)) for i in range(n + 2)]
+    offsets = []
+    for i in range(n + 1):
+        offsets.extend((0., 0.) + points[i] + points[i + 1])
+    return tuple(offsets)
+
+
+@lru_cache(maxsize=None)
+def _colors(color, count):
+    """Flattened c4f color data of count vertices for a RGB(A) color from 0 to 255."""
+    color = [i / 255. for i in color]
+    if len(color) == 3:
+        color.append(1)
+    return tuple(color) * count
+
+
 class Circle:
-    """Draw a filled disk (circle) and add it to a pyglet batch."""
+    """Draw a filled disk (circle) and add it to a pyglet batch.
 
-    def __init__(self, x, y, r=10, n=10, color=(0, 0, 0, 255), batch=None, group=None):
+    The vertices of all circles with the same radius and number of segments
+    are translated from one cached template, the color data is cached per
+    color. The color and the visibility can be changed later without
+    creating a new circle.
+    """
+
+    def __init__(self, x, y, r=10, n=10, color=(0, 0, 0, 255), batch=None, group=None, visible=True):
         if batch is None:
             raise ValueError('You must specify a pyglet batch for the circle!')
 
-        color = [i / 255. for i in color]
-        if len(color) == 3:
-            color.append(1)
+        self.x = x
+        self.y = y
+        self._color = tuple(color)
+        self._visible = visible
+
+        offsets = _circle_offsets(r, n)
+        self._count = len(offsets) // 2
+        self._pos = [c + d for c, d in zip((x, y) * self._count, offsets)]
+
+        self.vertex_list = batch.add(self._count, pyglet.gl.GL_TRIANGLES, group,
+                                     ('v2f', self._pos if visible else self._hidden()),
+                                     ('c4f', _colors(self._color, self._count)))
+
+    def _hidden(self):
+        """All vertices in the center, nothing is drawn."""
+        return (self.x, self.y) * self._count
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        color = tuple(color)
+        if color != self._color:
+            self._color = color
+            self.vertex_list.colors[:] = _colors(color, self._count)
+
+    @property
+    def visible(self):
+        return self._visible
 
-        pos = sum([[x, y,
-                    x + r * math.cos(i * 2 * math.pi / n), y + r * math.sin(i * 2 * math.pi / n),
-                    x + r * math.cos((i + 1) * 2 * math.pi / n), y + r * math.sin((i + 1) * 2 * math.pi / n)]
-                   for i in range(n + 1)], [])
+    @visible.setter
+    def visible(self, visible):
+        if visible != self._visible:
+            self._visible = visible
+            self.vertex_list.vertices[:] = self._pos if visible else self._hidden()
 
-        batch.add(3 * (n + 1), pyglet.gl.GL_TRIANGLES, group, ('v2f', pos),
-                  ('c4f', sum([color for _ in range(3 * (n + 1))], [])))
+    def delete(self):
+        self.vertex_list.delete()
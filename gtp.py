@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains a Go Text Protocol (GTP version 2) front-end for the
+Model, so that the engine can be used by match runners, GUIs and analysis
+tools over stdin/stdout:
+
+    python3 gtp.py [--playouts 1000]
+
+Supported commands: protocol_version, name, version, known_command,
+list_commands, quit, boardsize, clear_board, komi, play, genmove, undo,
+final_score and showboard. genmove asks the computer player (mcts.MCTSPlayer
+with --playouts) or, by default, plays a random move that does not fill an
+own eye (simulate.random_policy).
+
+Commands work on the Model directly (board, turn, score), the GUI data of
+get_data is never built. final_score scores a clone of the position with
+find_territory, so the game can go on afterwards.
+"""
+
+import argparse
+import random
+import sys
+from functools import lru_cache
+
+from game_model import Model
+from geometry import check_size
+from simulate import random_policy
+
+BLACK = True
+WHITE = False
+
+# the letter I is not used
+LETTERS = 'ABCDEFGHJKLMNOPQRSTUVWXYZ'
+
+COLORS = {'b': BLACK, 'black': BLACK, 'w': WHITE, 'white': WHITE}
+
+
+class GTPError(Exception):
+    """Failure of a command, the message is sent to the controller."""
+
+
+@lru_cache(maxsize=None)
+def vertex_table(n):
+    """Returns the GTP names of the fields of a board of size n.
+
+    Row 1 is the row y = 0 (at the bottom of the GUI), the columns are
+    named A to Z without I.
+
+    Returns:
+        (tuple): {name: (x, y)} with upper case names and the names
+                 indexed by y * n + x
+    """
+    names = tuple('%s%d' % (LETTERS[x], y + 1) for y in range(n) for x in range(n))
+    fields = {name: (p % n, p // n) for p, name in enumerate(names)}
+    return fields, names
+
+
+class GTPEngine:
+    """Answers GTP commands for one game at a time.
+
+    Attributes:
+        model (Model)   : the current game
+        player          : computer player with genmove(model) or None (random moves)
+        komi (float)    : points added to the score of white
+        commands (dict) : name -> method of the supported commands
+    """
+
+    def __init__(self, player=None, size=19, komi=0., seed=None):
+        """
+        Arguments:
+            player          : computer player with genmove(model), e.g. mcts.MCTSPlayer
+            size (int)      : size of the first board
+            komi (float)    : points added to the score of white
+            seed (int)      : seed of the random moves
+        """
+        self.player = player
+        self.komi = komi
+        self.rng = random.Random(seed)
+        self.model = Model(size)
+        self.quit = False
+        self.commands = {
+            'protocol_version': self.protocol_version,
+            'name': self.name,
+            'version': self.version,
+            'known_command': self.known_command,
+            'list_commands': self.list_commands,
+            'quit': self.cmd_quit,
+            'boardsize': self.boardsize,
+            'clear_board': self.clear_board,
+            'komi': self.set_komi,
+            'play': self.play,
+            'genmove': self.genmove,
+            'undo': self.undo,
+            'final_score': self.final_score,
+            'showboard': self.showboard,
+        }
+
+    def protocol_version(self, args):
+        return '2'
+
+    def name(self, args):
+        return 'Project Go'
+
+    def version(self, args):
+        return '1.0'
+
+    def known_command(self, args):
+        return 'true' if args and args[0] in self.commands else 'false'
+
+    def list_commands(self, args):
+        return '\n'.join(self.commands)
+
+    def cmd_quit(self, args):
+        self.quit = True
+        return ''
+
+    def boardsize(self, args):
+        try:
+            size = check_size(int(args[0]))
+        except (IndexError, ValueError):
+            raise GTPError('unacceptable size')
+        self.model = Model(size)
+        return ''
+
+    def clear_board(self, args):
+        self.model = Model(self.model.size)
+        return ''
+
+    def set_komi(self, args):
+        try:
+            self.komi = float(args[0])
+        except (IndexError, ValueError):
+            raise GTPError('syntax error')
+        if hasattr(self.player, 'komi'):
+            self.player.komi = self.komi
+        return ''
+
+    def _color(self, args):
+        try:
+            return COLORS[args[0].lower()]
+        except (IndexError, KeyError):
+            raise GTPError('syntax error')
+
+    def play(self, args):
+        color = self._color(args)
+        if len(args) < 2:
+            raise GTPError('syntax error')
+        vertex = args[1].upper()
+        model = self.model
+        pos = None
+        if vertex != 'PASS':
+            pos = vertex_table(model.size)[0].get(vertex)
+            if pos is None:
+                raise GTPError('invalid coordinate')
+
+        # a move that is not accepted leaves the turn as it was
+        turn = model.turn
+        model.turn = color
+        if not (model.passing() if pos is None else model.place_stone(*pos)):
+            model.turn = turn
+            raise GTPError('illegal move')
+        return ''
+
+    def genmove(self, args):
+        model = self.model
+        model.turn = self._color(args)
+        if model.game_over:
+            return 'pass'
+
+        if self.player is not None:
+            candidates = [self.player.genmove(model)]
+        else:
+            candidates = random_policy(model, self.rng)
+        for pos in candidates:
+            if pos is not None and model.place_stone(*pos):
+                x, y = pos
+                return vertex_table(model.size)[1][y * model.size + x]
+        model.passing()
+        return 'pass'
+
+    def undo(self, args):
+        if not self.model.undo():
+            raise GTPError('cannot undo')
+        return ''
+
+    def final_score(self, args):
+        position = self.model.clone()
+        position.find_territory()
+        white = position.score[WHITE] + position.captured[WHITE] + self.komi
+        black = position.score[BLACK] + position.captured[BLACK]
+        if white == black:
+            return '0'
+        return '%s+%g' % ('B' if black > white else 'W', abs(black - white))
+
+    def showboard(self, args):
+        model = self.model
+        n = model.size
+        board = model.board
+        letters = '   ' + ' '.join(LETTERS[:n])
+        lines = [letters]
+        for y in range(n - 1, -1, -1):
+            row = board[y * n:(y + 1) * n]
+            lines.append('%2d %s %d' % (y + 1, ' '.join(
+                '.' if grp is None else 'X' if grp.color else 'O' for grp in row), y + 1))
+        lines.append(letters)
+        lines.append('captured: black %d, white %d' % (model.captured[BLACK], model.captured[WHITE]))
+        return '\n' + '\n'.join(lines)
+
+    def handle(self, line):
+        """Executes one line of input.
+
+        Arguments:
+            line (str): the command with an optional id in front
+
+        Returns:
+            (str): the response (ending with an empty line) or None if the
+                   line was empty or only a comment
+        """
+        if '#' in line:
+            line = line[:line.index('#')]
+        words = line.split()
+        if not words:
+            return None
+
+        number = ''
+        if words[0].isdigit():
+            number = words.pop(0)
+            if not words:
+                return '?%s syntax error\n\n' % number
+
+        command = self.commands.get(words[0].lower())
+        if command is None:
+            return '?%s unknown command\n\n' % number
+        try:
+            result = command(words[1:])
+        except GTPError as error:
+            return '?%s %s\n\n' % (number, error)
+        return '=%s %s\n\n' % (number, result) if result else '=%s\n\n' % number
+
+    def run(self, stream, out):
+        """Answers the commands of stream until quit or the end of the input.
+
+        Arguments:
+            stream (file)   : e.g. sys.stdin
+            out (file)      : e.g. sys.stdout, flushed after every response
+        """
+        for line in stream:
+            response = self.handle(line)
+            if response is not None:
+                out.write(response)
+                out.flush()
+            if self.quit:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Go Text Protocol engine on stdin/stdout.')
+    parser.add_argument('--size', type=int, default=19)
+    parser.add_argument('--komi', type=float, default=0.)
+    parser.add_argument('--playouts', type=int, default=0,
+                        help='playouts of the computer player (0: random moves)')
+    parser.add_argument('--seconds', type=float, default=None, help='thinking time per move')
+    parser.add_argument('--workers', type=int, default=1, help='processes for the playouts')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    player = None
+    if args.playouts or args.seconds:
+        from mcts import MCTSPlayer
+        player = MCTSPlayer(playouts=args.playouts, seconds=args.seconds, workers=args.workers,
+                            komi=args.komi, seed=args.seed)
+
+    engine = GTPEngine(player, args.size, args.komi, args.seed)
+    try:
+        engine.run(sys.stdin, sys.stdout)
+    finally:
+        if player is not None:
+            player.close()
+
+
+if __name__ == '__main__':
+    main()
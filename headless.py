@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains a front-end for the Controller without a display.
+
+HeadlessView keeps the same data as client.Window but draws nothing, so
+the controller can be used in batch jobs, tests and worker processes
+(and on servers without a display) without importing pyglet. run() lets
+a human play in the terminal:
+
+    python3 controller.py --headless
+"""
+
+BLACK = True
+WHITE = False
+
+SYMBOLS = {None: '.', BLACK: 'X', WHITE: 'O'}
+
+
+class HeadlessView:
+    """View that only keeps the data received from the controller.
+
+    Attributes:
+        data (dict)     : the same data as client.Window.data
+        message (str)   : the last message of the controller
+        out (file)      : messages are written to it if it is not None
+    """
+
+    def __init__(self, out=None):
+        self.controller = None
+        self.out = out
+        self.message = ''
+        self.debug = ''
+        self.data = {'size': 0, 'stones': [], 'territory': [], 'color': None,
+                     'game_over': False, 'score': [0, 0]}
+
+    def receive_data(self, data):
+        """ Stores the data received from the controller.
+
+            Arguments:
+                data    : data received from controller (dict)
+        """
+        self.data.update(data)
+        self.data['stones'] = [list(row) for row in data['stones']]
+        self.data['territory'] = [list(row) for row in data['territory']]
+
+    def receive_changes(self, changes):
+        """ Applies the changes received from the controller.
+
+            Arguments:
+                changes : data received from controller (dict), see Model.get_changes
+        """
+        if changes['full']:
+            self.receive_data(changes)
+            return
+
+        for key in ('game_over', 'score', 'color'):
+            self.data[key] = changes[key]
+        for (i, j), color in changes['stones'].items():
+            self.data['stones'][j][i] = color
+        for (i, j), color in changes['territory'].items():
+            self.data['territory'][j][i] = color
+
+    def show_message(self, text):
+        self.message = text
+        if self.out is not None:
+            self.out.write(text + '\n')
+
+    def show_debug(self, text):
+        self.debug = text
+
+    def render(self):
+        """ Draws the board as text, the top row first.
+
+            Returns:
+                (str): one line per row, territory of a finished game in lower case
+        """
+        n = self.data['size']
+        lines = []
+        for j in reversed(range(n)):
+            row = []
+            for i in range(n):
+                color = self.data['stones'][j][i]
+                symbol = SYMBOLS[color]
+                if color is None and self.data['game_over'] and self.data['territory'][j][i] is not None:
+                    symbol = SYMBOLS[self.data['territory'][j][i]].lower()
+                row.append(symbol)
+            lines.append('%2d %s' % (j, ' '.join(row)))
+        lines.append('   ' + ' '.join(str(i % 10) for i in range(n)))
+        lines.append('score: black %d, white %d' % (self.data['score'][1], self.data['score'][0]))
+        return '\n'.join(lines)
+
+
+def run(controller, stream, out=None):
+    """Reads commands from stream and passes them on to the controller.
+
+    Commands: "x y" (place a stone or, after the game, mark territory),
+    "pass", "new", "show" and "quit". Work of the controller in the
+    background (computer moves, scoring) is waited for after every command.
+
+    Arguments:
+        controller (Controller) : controller with a HeadlessView
+        stream (file)           : e.g. sys.stdin
+        out (file)              : where the board is shown (default: the view's out)
+    """
+    view = controller.view
+    out = out or view.out
+    controller.wait()
+    if out is not None:
+        out.write(view.render() + '\n')
+    for line in stream:
+        words = line.split()
+        if not words:
+            continue
+        if words[0] == 'quit':
+            break
+        elif words[0] == 'pass':
+            controller.passing()
+        elif words[0] == 'new':
+            controller.new_game()
+        elif words[0] != 'show':
+            try:
+                pos = int(words[0]), int(words[1])
+            except (ValueError, IndexError):
+                view.show_message('Unknown command: %s' % line.strip())
+                continue
+            if not all(0 <= v < view.data['size'] for v in pos):
+                view.show_message('Invalid move!')
+                continue
+            if view.data['game_over']:
+                controller.mark_territory(pos)
+            else:
+                controller.play(pos)
+        controller.wait()
+        if out is not None:
+            out.write(view.render() + '\n')
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module measures how long the phases of a move take (e.g. the
+controller's play, the model's place_stone or the window update).
+
+The methods are wrapped on the instances only when the instrumentation
+is enabled, so there is no cost at all otherwise. Every phase keeps the
+latencies of its last calls in a rolling histogram. A phase can also be
+run under cProfile for a number of calls.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import time
+from collections import deque
+
+
+class Histogram:
+    """Latencies (in ns) of the last calls of a phase."""
+
+    def __init__(self, size=1000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, ns):
+        self.samples.append(ns)
+        self.count += 1
+
+    def summary(self):
+        """Returns:
+            (dict): calls (total), p50, p90, p99 and max in ms of the retained calls
+        """
+        samples = sorted(self.samples)
+        if not samples:
+            return {'calls': self.count}
+        n = len(samples)
+        return {'calls': self.count,
+                'p50': samples[n // 2] / 1e6,
+                'p90': samples[min(n - 1, int(.9 * n))] / 1e6,
+                'p99': samples[min(n - 1, int(.99 * n))] / 1e6,
+                'max': samples[-1] / 1e6}
+
+
+class Instrumentation:
+    """Collects the timings of the wrapped methods.
+
+    Attributes:
+        histograms (dict): phase name -> Histogram
+    """
+
+    def __init__(self, size=1000, out=None):
+        """
+        Arguments:
+            size (int) : number of calls kept per phase
+            out (file) : where the profiles are printed (default sys.stderr)
+        """
+        self.size = size
+        self.out = out or sys.stderr
+        self.histograms = {}
+        self.profiling = {}  # phase -> [cProfile.Profile, remaining calls, path]
+
+    def wrap(self, obj, name, phase=None):
+        """Replaces the method obj.name (on the instance only) with a timed version.
+
+        Arguments:
+            obj         : instance whose method is wrapped
+            name (str)  : name of the method
+            phase (str) : name of the phase (default: name)
+        """
+        phase = phase or name
+        method = getattr(obj, name)
+        histogram = self.histograms.setdefault(phase, Histogram(self.size))
+        timer = time.perf_counter_ns
+        profiling = self.profiling
+
+        def timed(*args, **kwargs):
+            if phase in profiling:
+                return self._profiled(phase, method, args, kwargs)
+            start = timer()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.add(timer() - start)
+
+        timed.__wrapped__ = method
+        setattr(obj, name, timed)
+
+    def _profiled(self, phase, method, args, kwargs):
+        entry = self.profiling[phase]
+        profile = entry[0]
+        start = time.perf_counter_ns()
+        try:
+            return profile.runcall(method, *args, **kwargs)
+        finally:
+            self.histograms[phase].add(time.perf_counter_ns() - start)
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self.profiling[phase]
+                self._report(phase, profile, entry[2])
+
+    def _report(self, phase, profile, path):
+        if path is not None:
+            profile.dump_stats(path)
+            return
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(20)
+        self.out.write('Profile of %s:\n%s' % (phase, stream.getvalue()))
+
+    def profile(self, phase, calls=100, path=None):
+        """Runs the next calls of a phase under cProfile.
+
+        Arguments:
+            phase (str) : name of a wrapped phase
+            calls (int) : number of calls to profile
+            path (str)  : file for the pstats data, None to print the top functions
+        """
+        self.profiling[phase] = [cProfile.Profile(), calls, path]
+
+    def stats(self):
+        """Returns:
+            (dict): phase name -> summary of its histogram
+        """
+        return {phase: histogram.summary() for phase, histogram in self.histograms.items()}
+
+    def dump(self):
+        """Returns:
+            (str): one line per phase with the number of calls and percentiles
+        """
+        lines = []
+        for phase, summary in sorted(self.stats().items()):
+            if 'p50' in summary:
+                lines.append('%-20s %6d calls  p50 %7.3f  p90 %7.3f  p99 %7.3f  max %7.3f ms' % (
+                    phase, summary['calls'], summary['p50'], summary['p90'], summary['p99'], summary['max']))
+        return '\n'.join(lines)
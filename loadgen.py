@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load generator for server.py.
+
+Plays many random games at once over a few connections, each connection
+plays both colors of its games. The time from sending a move to its
+response is recorded and the throughput and latency percentiles are
+printed at the end.
+
+    python3 server.py --port 8765 &
+    python3 loadgen.py --port 8765 --games 2000 --connections 20
+
+With --local the server runs in the same process (and event loop).
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from benchmarks.harness import percentiles
+import server
+
+BLACK = True
+WHITE = False
+
+
+class Client:
+    """A connection to the server that matches responses to requests by id."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count()
+        self.pending = {}  # request id -> Future
+        self.games = {}  # game id -> set of empty fields
+        self.over = set()  # finished games
+        self.task = asyncio.ensure_future(self._read())
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        return cls(reader, writer)
+
+    async def _read(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if 'event' in message:
+                self._apply(message)
+            else:
+                self.pending.pop(message['id']).set_result(message)
+        for future in self.pending.values():
+            future.set_exception(ConnectionError('connection closed'))
+
+    def _apply(self, state):
+        """Keeps track of the empty fields of a game."""
+        empty = self.games.get(state.get('game'))
+        if empty is None:
+            return
+        for x, y, color in state['stones']:
+            if color is None:
+                empty.add((x, y))
+            else:
+                empty.discard((x, y))
+        if state['game_over']:
+            self.over.add(state['game'])
+
+    def request(self, message):
+        """Sends a request.
+
+        Returns:
+            (Future): the response
+        """
+        message['id'] = next(self.ids)
+        future = asyncio.get_event_loop().create_future()
+        self.pending[message['id']] = future
+        self.writer.write((json.dumps(message, separators=(',', ':')) + '\n').encode())
+        return future
+
+    async def close(self):
+        """Closes the connection and waits until the server closed its side."""
+        self.writer.write_eof()
+        await self.task
+        self.writer.close()
+
+
+async def play(client, size, moves, rng, latencies, tries=5):
+    """Plays one random game on the server.
+
+    Arguments:
+        client (Client)  : connection that plays both colors
+        size (int)       : size of the board
+        moves (int)      : the game ends with two passes after this many moves
+        rng (Random)     : random number generator
+        latencies (list) : the latency of every move (ns) is appended
+        tries (int)      : illegal moves tried before passing
+
+    Returns:
+        (int): number of moves played (including passes)
+    """
+    timer = time.perf_counter_ns
+    response = await client.request({'op': 'create', 'size': size, 'role': 'black'})
+    game = response['game']
+    response = await client.request({'op': 'join', 'game': game, 'role': 'white'})
+    state = response['state']
+    client.games[game] = {(x, y) for x in range(size) for y in range(size)}
+    client._apply(dict(state, game=game))
+
+    played = 0
+    while game not in client.over:
+        request = {'op': 'pass', 'game': game}
+        if played < moves:
+            candidates = rng.sample(sorted(client.games[game]), min(tries, len(client.games[game])))
+        else:
+            candidates = []
+        for x, y in candidates:
+            start = timer()
+            response = await client.request({'op': 'play', 'game': game, 'x': x, 'y': y})
+            latencies.append(timer() - start)
+            if response['ok']:
+                break
+        else:
+            start = timer()
+            response = await client.request(request)
+            latencies.append(timer() - start)
+        played += 1
+
+    await client.request({'op': 'leave', 'game': game})
+    del client.games[game]
+    client.over.discard(game)
+    return played
+
+
+async def run(host='127.0.0.1', port=8765, games=1000, connections=10, size=19, moves=100, seed=0):
+    """Plays the games concurrently.
+
+    Returns:
+        (dict): games, moves, seconds, moves_per_sec and the latency
+                percentiles in microseconds (see benchmarks.harness.percentiles)
+    """
+    clients = [await Client.connect(host, port) for _ in range(connections)]
+    latencies = []
+    start = time.perf_counter()
+    played = await asyncio.gather(*[
+        play(clients[i % connections], size, moves, random.Random(seed + i), latencies)
+        for i in range(games)])
+    seconds = time.perf_counter() - start
+    await asyncio.gather(*[client.close() for client in clients])
+
+    return {'games': games, 'moves': sum(played), 'seconds': seconds,
+            'moves_per_sec': len(latencies) / seconds, 'latency': percentiles(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the Go server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--games', type=int, default=1000, help='concurrent games')
+    parser.add_argument('--connections', type=int, default=10)
+    parser.add_argument('--size', type=int, default=19)
+    parser.add_argument('--moves', type=int, default=100, help='moves per game before both players pass')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--local', action='store_true', help='run the server in this process')
+    args = parser.parse_args()
+
+    async def main_async():
+        listener = None
+        if args.local:
+            listener = await server.serve(args.host, args.port)
+        try:
+            return await run(args.host, args.port, args.games, args.connections,
+                             args.size, args.moves, args.seed), listener
+        finally:
+            if listener is not None:
+                listener.close()
+                await listener.wait_closed()
+
+    result, listener = asyncio.run(main_async())
+    latency = result['latency']
+    print('%d games, %d moves in %.2f s: %.0f moves/s' % (
+        result['games'], result['moves'], result['seconds'], result['moves_per_sec']))
+    print('move latency: p50 %.2f ms  p90 %.2f ms  p99 %.2f ms  max %.2f ms' % (
+        latency['p50'] / 1e3, latency['p90'] / 1e3, latency['p99'] / 1e3, latency['max'] / 1e3))
+    if listener is not None:
+        print('games left on the server: %d' % len(listener.game_server.games))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains a computer player based on Monte Carlo Tree Search
+(UCT). Moves are explored on a clone of the Model with place_stone/passing
+and taken back with undo, the random playouts are scored with
+find_territory.
+
+The playouts can be spread over a process pool in two ways:
+    'root': every worker grows its own tree, the visits of the root
+            moves are summed up at the end
+    'leaf': one tree, every new leaf is evaluated by one playout per worker
+"""
+
+import math
+import multiprocessing
+import random
+import time
+
+from simulate import is_eye, play_out, winner
+
+BLACK = True
+WHITE = False
+
+PASS = None
+
+
+class Node:
+    """Node of the search tree.
+
+    Attributes:
+        move (tuple)    : move that leads to this node ((x, y) or PASS)
+        color (bool)    : color of the player who played move
+        parent (Node)   : parent node (None for the root)
+        children (list) : expanded child nodes
+        untried (list)  : moves that have not been expanded yet
+        visits (int)    : number of playouts through this node
+        wins (float)    : playouts won by color (draws count 1/2)
+    """
+
+    def __init__(self, model, move=PASS, parent=None, rng=None):
+        self.move = move
+        self.color = not model.turn
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.wins = 0.
+
+        if model.game_over:
+            self.untried = []
+        else:
+            self.untried = [pos for pos, grp in zip(model.coords, model.board)
+                            if grp is None and not is_eye(model, *pos)]
+            (rng or random).shuffle(self.untried)
+            self.untried.insert(0, PASS)  # expanded last
+
+    def select(self, c):
+        """Returns the child with the highest UCT value."""
+        log_n = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: child.wins / child.visits + c * math.sqrt(log_n / child.visits))
+
+
+def _play(model, move):
+    if move is PASS:
+        return model.passing()
+    return model.place_stone(*move)
+
+
+def _playout(model, rng, komi):
+    """Plays a random game from the current position, scores it and takes
+    all moves back again.
+
+    Returns:
+        (bool or None): winner of the playout
+    """
+    depth = len(model.moves)
+    play_out(model, rng=rng)
+    model.find_territory()
+    result = winner(model, komi)
+    while len(model.moves) > depth:
+        model.undo()
+    return result
+
+
+def _leaf_playouts(args):
+    """Runs playouts from a position in a worker process (leaf parallelism).
+
+    Returns:
+        (list): winners of the playouts
+    """
+    model, seed, count, komi = args
+    rng = random.Random(seed)
+    return [_playout(model, rng, komi) for _ in range(count)]
+
+
+def search(model, playouts=None, seconds=None, c=1.4, komi=0, seed=None, pool=None, leaf_workers=1):
+    """Grows a search tree from the position of model.
+
+    Arguments:
+        model (Model)     : the position, it is not changed
+        playouts (int)    : playout budget
+        seconds (float)   : time budget (used if playouts is None)
+        c (float)         : exploration constant
+        komi (float)      : points added to the score of white
+        seed (int)        : seed of the random generator
+        pool (Pool)       : pool that evaluates leaves (leaf parallelism)
+        leaf_workers (int): playouts per leaf if a pool is given
+
+    Returns:
+        (tuple): root node and number of playouts
+    """
+    rng = random.Random(seed)
+    model = model.clone()
+    root = Node(model, rng=rng)
+    depth = len(model.moves)
+    deadline = time.perf_counter() + seconds if playouts is None else None
+
+    count = 0
+    while (count < playouts) if deadline is None else (time.perf_counter() < deadline):
+        node = root
+
+        # selection
+        while not node.untried and node.children:
+            node = node.select(c)
+            _play(model, node.move)
+
+        # expansion
+        while node.untried:
+            move = node.untried.pop()
+            if _play(model, move):
+                child = Node(model, move, node, rng)
+                node.children.append(child)
+                node = child
+                break
+
+        # simulation
+        if pool is None:
+            results = [_playout(model, rng, komi)]
+        else:
+            jobs = [(model, rng.getrandbits(32), 1, komi) for _ in range(leaf_workers)]
+            results = [r for chunk in pool.map(_leaf_playouts, jobs) for r in chunk]
+        count += len(results)
+
+        # backpropagation
+        while node is not None:
+            node.visits += len(results)
+            node.wins += sum(1. if r == node.color else 0.5 if r is None else 0. for r in results)
+            node = node.parent
+
+        while len(model.moves) > depth:
+            model.undo()
+
+    return root, count
+
+
+def _root_search(args):
+    """Grows an independent tree in a worker process (root parallelism).
+
+    Returns:
+        (tuple): {move: (visits, wins)} of the root and number of playouts
+    """
+    model, playouts, seconds, c, komi, seed = args
+    root, count = search(model, playouts, seconds, c, komi, seed)
+    return {child.move: (child.visits, child.wins) for child in root.children}, count
+
+
+class MCTSPlayer:
+    """Computer player that chooses its moves with UCT.
+
+    Attributes:
+        stats (dict): playouts, seconds and playouts_per_sec of the last search
+    """
+
+    def __init__(self, playouts=1000, seconds=None, workers=1, parallel='root', c=1.4, komi=0, seed=None):
+        """
+        Arguments:
+            playouts (int)  : playouts per move (ignored if seconds is given)
+            seconds (float) : thinking time per move
+            workers (int)   : number of processes for the playouts
+            parallel (str)  : 'root' or 'leaf' parallelism
+            c (float)       : exploration constant
+            komi (float)    : points added to the score of white
+            seed (int)      : seed of the random generator
+        """
+        if parallel not in ('root', 'leaf'):
+            raise ValueError("parallel must be 'root' or 'leaf'")
+        self.playouts = None if seconds is not None else playouts
+        self.seconds = seconds
+        self.workers = workers
+        self.parallel = parallel
+        self.c = c
+        self.komi = komi
+        self.rng = random.Random(seed)
+        self.pool = None
+        self.stats = {'playouts': 0, 'seconds': 0., 'playouts_per_sec': 0.}
+
+    def _pool(self):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers)
+        return self.pool
+
+    def __getstate__(self):
+        # the pool is not sent along when the player is pickled (background.py)
+        state = self.__dict__.copy()
+        state['pool'] = None
+        return state
+
+    def close(self):
+        """Shuts down the process pool."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+    def genmove(self, model):
+        """Searches the best move for the player to move.
+
+        Arguments:
+            model (Model): the current game, it is not changed
+
+        Returns:
+            (tuple or None): (x, y) of the move or PASS (None)
+        """
+        start = time.perf_counter()
+
+        if self.workers <= 1:
+            root, count = search(model, self.playouts, self.seconds, self.c, self.komi,
+                                 self.rng.getrandbits(32))
+            totals = {child.move: child.visits for child in root.children}
+        elif self.parallel == 'leaf':
+            root, count = search(model, self.playouts, self.seconds, self.c, self.komi,
+                                 self.rng.getrandbits(32), self._pool(), self.workers)
+            totals = {child.move: child.visits for child in root.children}
+        else:
+            playouts = None if self.playouts is None else max(1, self.playouts // self.workers)
+            jobs = [(model, playouts, self.seconds, self.c, self.komi, self.rng.getrandbits(32))
+                    for _ in range(self.workers)]
+            totals = {}
+            count = 0
+            for children, n in self._pool().map(_root_search, jobs):
+                count += n
+                for move, (visits, _) in children.items():
+                    totals[move] = totals.get(move, 0) + visits
+
+        seconds = time.perf_counter() - start
+        self.stats = {'playouts': count, 'seconds': seconds,
+                      'playouts_per_sec': count / seconds if seconds else 0.}
+
+        if not totals:
+            return PASS
+        return max(totals, key=totals.get)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module scores finished games automatically, dead stones included.
+
+find_territory only claims empty areas that are surrounded by one color,
+so stones that are dead inside the territory of the opponent have to be
+marked by hand. Here the final position is played out many times with
+random moves (simulate.random_policy, which never fills its own eyes) on
+a process pool. The ownership of a field is the average over the playouts
+(+1 black, -1 white). Groups that end up owned by the opponent are dead,
+they become territory of the opponent together with the empty fields
+that clearly belong to one player.
+
+    python3 ownership.py [archive.sgf] [--playouts 200] [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+from array import array
+
+from simulate import play_out
+from transposition import OWNERSHIP, position_key
+
+BLACK = True
+WHITE = False
+
+# Random playouts dilute the ownership, even safe groups rarely get above 0.8
+THRESHOLD = 0.3
+
+
+def _playouts(args):
+    """Plays out a position several times in a worker process.
+
+    Returns:
+        (list): sum of the owners (+1 black, -1 white) of every field
+    """
+    model, seed, count = args
+    rng = random.Random(seed)
+    n = model.size
+    coords = model.coords
+    board = model.board
+    territory = model.territory
+    total = [0] * (n * n)
+    depth = len(model.moves)
+
+    for _ in range(count):
+        play_out(model, rng=rng)
+        model.find_territory()
+        for p, grp in enumerate(board):
+            if grp is not None:
+                color = grp.color
+            else:
+                x, y = coords[p]
+                color = territory[y][x]
+            if color is BLACK:
+                total[p] += 1
+            elif color is WHITE:
+                total[p] -= 1
+        while len(model.moves) > depth:
+            model.undo()
+    return total
+
+
+def estimate(model, playouts=200, workers=1, seed=None, pool=None, table=None):
+    """Estimates who owns every field at the end of the game.
+
+    Arguments:
+        model (Model)   : the position, it is not changed
+        playouts (int)  : number of random playouts
+        workers (int)   : number of processes (1: no pool)
+        seed (int)      : seed of the random generator
+        pool (Pool)     : pool to use instead of creating one
+        table (TranspositionTable): optional cache, an estimate of the same
+                          position with at least as many playouts is reused
+
+    Returns:
+        (tuple): ownership (2d list [y][x] of floats from -1 white to
+                 +1 black) and stats (playouts, seconds, playouts_per_sec;
+                 0 playouts if the estimate came from the table)
+    """
+    start = time.perf_counter()
+    n = model.size
+    if table is not None:
+        key = position_key(model, OWNERSHIP)
+        cached = table.get(key, playouts)
+        if cached is not None:
+            ownership = [list(cached[y * n:(y + 1) * n]) for y in range(n)]
+            return ownership, {'playouts': 0, 'seconds': time.perf_counter() - start, 'playouts_per_sec': 0.}
+
+    position = model.clone()
+    position.game_over = False
+    position.has_passed = False
+    # territory found or marked on the model would be read as the owner of
+    # the fields that stay neutral in a playout
+    position.territory = [[None] * n for _ in range(n)]
+    position.score = [0, 0]
+
+    rng = random.Random(seed)
+    chunks = max(1, min(workers, playouts))
+    jobs = [(position, rng.getrandbits(32), playouts // chunks + (i < playouts % chunks))
+            for i in range(chunks)]
+
+    if pool is not None:
+        results = pool.map(_playouts, jobs)
+    elif chunks > 1:
+        with multiprocessing.Pool(chunks) as pool:
+            results = pool.map(_playouts, jobs)
+    else:
+        results = [_playouts(jobs[0])]
+
+    total = [sum(values) for values in zip(*results)]
+    ownership = [[total[y * n + x] / playouts for x in range(n)] for y in range(n)]
+    if table is not None:
+        table.put(key, array('d', (value / playouts for value in total)), playouts)
+
+    seconds = time.perf_counter() - start
+    stats = {'playouts': playouts, 'seconds': seconds,
+             'playouts_per_sec': playouts / seconds if seconds else 0.}
+    return ownership, stats
+
+
+def dead_groups(model, ownership, threshold=THRESHOLD):
+    """Finds the groups that are owned by the opponent.
+
+    Arguments:
+        model (Model)       : the position
+        ownership (2d list) : result of estimate
+        threshold (float)   : average ownership of the stones (towards the
+                              opponent) from which a group is dead
+
+    Returns:
+        (list): dead Group objects
+    """
+    coords = model.coords
+    dead = []
+    for grp in set(model.board):
+        if grp is None:
+            continue
+        owner = sum(ownership[coords[p][1]][coords[p][0]] for p in grp.stones) / len(grp.stones)
+        if (owner if grp.color == WHITE else -owner) >= threshold:
+            dead.append(grp)
+    return dead
+
+
+def mark_ownership(model, ownership, threshold=THRESHOLD):
+    """Fills model.territory from the ownership and computes the score.
+
+    Dead stones become territory of the opponent (and count as prisoners),
+    empty fields become territory of the player who owns them with at
+    least threshold, the other fields are neutral.
+
+    Returns:
+        (list): the dead groups
+    """
+    dead = dead_groups(model, ownership, threshold)
+    dead_stones = {p: not grp.color for grp in dead for p in grp.stones}
+
+    for p, (x, y) in enumerate(model.coords):
+        if model.board[p] is not None:
+            color = dead_stones.get(p)
+        elif ownership[y][x] >= threshold:
+            color = BLACK
+        elif ownership[y][x] <= -threshold:
+            color = WHITE
+        else:
+            color = None
+        model._set_territory(x, y, color)
+
+    model._compute_score()
+    model._commit()
+    return dead
+
+
+def auto_score(model, playouts=200, workers=1, seed=None, threshold=THRESHOLD, pool=None, table=None):
+    """Scores a finished game with dead stone detection, see estimate and
+    mark_ownership. model.territory and model.score are updated.
+
+    Returns:
+        (dict): score (white, black) as in get_data, dead (number of dead
+                groups) and the stats of estimate
+    """
+    ownership, stats = estimate(model, playouts, workers, seed, pool, table)
+    dead = mark_ownership(model, ownership, threshold)
+    result = {'score': model.get_data()['score'], 'dead': len(dead)}
+    result.update(stats)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scores finished games with dead stone detection.')
+    parser.add_argument('files', nargs='*', help='SGF files (default: random games)')
+    parser.add_argument('--games', type=int, default=10, help='number of random games')
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--playouts', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.files:
+        import sgf
+        models = (sgf.replay(game)[0] for source in args.files for game in sgf.iter_games(source))
+    else:
+        from simulate import play_game
+        # stopped early, so that there are dead stones left on the board
+        models = (play_game(args.size, seed=args.seed + i, max_moves=args.size * args.size)[0]
+                  for i in range(args.games))
+
+    pool = multiprocessing.Pool(args.workers) if args.workers > 1 else None
+    games = playouts = 0
+    start = time.perf_counter()
+    try:
+        for model in models:
+            while not model.game_over:
+                model.passing()
+            model.find_territory()
+            before = model.get_data()['score']
+            result = auto_score(model, args.playouts, args.workers, args.seed + games, args.threshold, pool)
+            games += 1
+            playouts += result['playouts']
+            print('game %d: %d dead groups, black %d white %d (find_territory: black %d white %d)' % (
+                games, result['dead'], result['score'][BLACK], result['score'][WHITE],
+                before[BLACK], before[WHITE]))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    seconds = time.perf_counter() - start
+    print('%d games, %d playouts in %.2f s: %.0f playouts/s, %.2f games/s' % (
+        games, playouts, seconds, playouts / seconds, games / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains a compact binary format for game records.
+
+A record file starts with a header (magic, version, byte order) and
+contains one block per game, every block is aligned to 4 bytes:
+
+    game header     size, result, number of moves, number of snapshots,
+                    snapshot interval, score of white and black
+    moves           one uint16 per move: color << 15 | y * size + x,
+                    a pass is color << 15 | PASS
+    snapshots       boards packed with 2 bits per field (EMPTY, BLACK_STONE,
+                    WHITE_STONE), snapshot j is the position after move
+                    min((j + 1) * interval, number of moves)
+
+The offsets of the games are kept in a second file (name + '.idx') as
+uint64, so RecordReader can jump to game i and move k without parsing
+the file. The reader maps both files with mmap and hands out memoryview
+slices, nothing is copied until a value is decoded.
+"""
+
+import mmap
+import struct
+import sys
+import weakref
+from array import array
+
+from game_model import Model
+
+BLACK = True
+WHITE = False
+
+MAGIC = b'GREC'
+VERSION = 1
+PASS = 0x7fff
+
+EMPTY = 0
+BLACK_STONE = 1
+WHITE_STONE = 2
+
+FILE_HEADER = struct.Struct('<4sBBH')  # magic, version, little endian (bool), reserved
+# moves and offsets are stored in the byte order of the machine that wrote the file
+GAME_HEADER = struct.Struct('<BbHHHhh')  # size, result, moves, snapshots, interval, score white, score black
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def snapshot_bytes(n):
+    """Number of bytes of a packed n x n board."""
+    return (n * n + 3) // 4
+
+
+def pack_board(stones):
+    """Packs a board with 2 bits per field.
+
+    Arguments:
+        stones (2d list): colors (or None) indexed [y][x], see Model._stones
+
+    Returns:
+        (bytearray): packed board, field (x, y) is at index y * n + x
+    """
+    n = len(stones)
+    packed = bytearray(snapshot_bytes(n))
+    values = {None: EMPTY, BLACK: BLACK_STONE, WHITE: WHITE_STONE}
+    p = 0
+    for row in stones:
+        for color in row:
+            packed[p >> 2] |= values[color] << ((p & 3) * 2)
+            p += 1
+    return packed
+
+
+def unpack_board(packed, n):
+    """Inverse of pack_board.
+
+    Returns:
+        (2d list): colors (or None) indexed [y][x]
+    """
+    colors = (None, BLACK, WHITE, None)
+    stones = []
+    p = 0
+    for _ in range(n):
+        row = []
+        for _ in range(n):
+            row.append(colors[(packed[p >> 2] >> ((p & 3) * 2)) & 3])
+            p += 1
+        stones.append(row)
+    return stones
+
+
+def _encode_move(move, n):
+    code = PASS if move.pos is None else move.pos[1] * n + move.pos[0]
+    return (move.color << 15) | code
+
+
+def decode_move(code, n):
+    """Decodes a packed move.
+
+    Returns:
+        (tuple): color and (x, y) or None for a pass
+    """
+    color = bool(code >> 15)
+    code &= PASS
+    if code == PASS:
+        return color, None
+    return color, (code % n, code // n)
+
+
+def _replay_snapshots(model, interval):
+    """Replays the moves of model and packs the boards at the snapshot points."""
+    moves = model.moves
+    if not interval or interval >= len(moves):
+        return [pack_board(model._stones())]
+
+    replay = Model(model.size)
+    snapshots = []
+    for k, move in enumerate(moves, 1):
+        replay.turn = move.color
+        if move.pos is None:
+            replay.passing()
+        else:
+            replay.place_stone(*move.pos)
+        if k % interval == 0 or k == len(moves):
+            snapshots.append(pack_board(replay._stones()))
+    return snapshots
+
+
+class RecordWriter:
+    """Appends games to a record file (and its index)."""
+
+    def __init__(self, path, interval=0):
+        """
+        Arguments:
+            path (str)      : name of the record file, it is created if necessary
+            interval (int)  : a snapshot is stored every interval moves,
+                              0 for the final position only
+        """
+        self.path = path
+        self.interval = interval
+        self.data = open(path, 'ab')
+        self.index = open(path + '.idx', 'ab')
+        if self.data.tell() == 0:
+            self.data.write(FILE_HEADER.pack(MAGIC, VERSION, sys.byteorder == 'little', 0))
+        self.offset = self.data.tell()
+
+    def _block(self, model, result):
+        n = model.size
+        moves = array('H', (_encode_move(move, n) for move in model.moves))
+        snapshots = _replay_snapshots(model, self.interval)
+        score = model.get_data()['score']
+        if result is None:
+            result = (score[BLACK] > score[WHITE]) - (score[WHITE] > score[BLACK])
+
+        block = bytearray(GAME_HEADER.pack(n, result, len(moves), len(snapshots),
+                                           self.interval if snapshots[1:] else len(moves),
+                                           score[WHITE], score[BLACK]))
+        block += moves.tobytes()
+        block += bytes(_align(len(block)) - len(block))
+        for snapshot in snapshots:
+            block += snapshot
+        block += bytes(_align(len(block)) - len(block))
+        return block
+
+    def append(self, model, result=None):
+        """Appends one game, see extend."""
+        self.extend([model], None if result is None else [result])
+
+    def extend(self, models, results=None):
+        """Appends several games with one write per file.
+
+        Arguments:
+            models (iterable): finished Model objects (Model.moves is stored)
+            results (list)   : 1 black won, -1 white won, 0 draw or unknown;
+                               by default the result is taken from the score
+        """
+        data = bytearray()
+        offsets = array('Q')
+        for i, model in enumerate(models):
+            offsets.append(self.offset + len(data))
+            data += self._block(model, None if results is None else results[i])
+
+        self.data.write(data)
+        self.index.write(offsets.tobytes())
+        self.offset += len(data)
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class GameRecord:
+    """View of one game inside a mapped record file.
+
+    Attributes:
+        size (int)           : size of the board
+        result (int)         : 1 black won, -1 white won, 0 draw or unknown
+        score (tuple)        : (white, black) score
+        interval (int)       : moves between two snapshots
+        moves (memoryview)   : packed moves (uint16), see decode_move
+        snapshots (memoryview): packed boards, snapshot_bytes(size) each
+
+    The views are released when the RecordReader is closed.
+    """
+
+    def __init__(self, buffer, offset, views=None):
+        """
+        Arguments:
+            buffer (memoryview): the mapped record file
+            offset (int)       : offset of the game block
+            views (WeakValueDictionary): collects the views that are handed out
+        """
+        self._views = views
+        n, self.result, n_moves, n_snapshots, self.interval, white, black = \
+            GAME_HEADER.unpack_from(buffer, offset)
+        self.size = n
+        self.score = (white, black)
+
+        start = offset + GAME_HEADER.size
+        self.moves = self._view(buffer[start:start + 2 * n_moves].cast('H'))
+        start = _align(start + 2 * n_moves)
+        self.snapshots = self._view(buffer[start:start + n_snapshots * snapshot_bytes(n)])
+
+    def _view(self, view):
+        if self._views is not None:
+            self._views[id(view)] = view
+        return view
+
+    def __len__(self):
+        return len(self.moves)
+
+    def move(self, k):
+        """Returns the color and position (None for a pass) of move k (from 0)."""
+        return decode_move(self.moves[k], self.size)
+
+    def snapshot(self, j):
+        """Returns the packed board of snapshot j (zero-copy)."""
+        length = snapshot_bytes(self.size)
+        return self._view(self.snapshots[j * length:(j + 1) * length])
+
+    def board(self, k=None):
+        """Computes the board after k moves from the closest earlier snapshot.
+
+        Arguments:
+            k (int): number of moves (default: all)
+
+        Returns:
+            (2d list): colors (or None) indexed [y][x]
+        """
+        n_moves = len(self.moves)
+        if k is None or k >= n_moves:
+            return unpack_board(self.snapshot(len(self.snapshots) // snapshot_bytes(self.size) - 1), self.size)
+
+        j = k // self.interval - 1 if self.interval else -1
+        if j >= 0:
+            stones = unpack_board(self.snapshot(j), self.size)
+            first = (j + 1) * self.interval
+        else:
+            stones = [[None] * self.size for _ in range(self.size)]
+            first = 0
+
+        # A snapshot is a legal position, so its stones can be placed one by one
+        model = Model(self.size)
+        for y, row in enumerate(stones):
+            for x, color in enumerate(row):
+                if color is not None:
+                    model.turn = color
+                    model.place_stone(x, y)
+        for i in range(first, k):
+            color, pos = self.move(i)
+            model.turn = color
+            if pos is None:
+                model.passing()
+            else:
+                model.place_stone(*pos)
+        return model._stones()
+
+
+class RecordReader:
+    """Random access to the games of a record file through mmap.
+
+    close releases the views of all GameRecords that were handed out, they
+    cannot be used afterwards (copy with bytes() what has to be kept).
+    """
+
+    def __init__(self, path):
+        self._files = [open(path, 'rb'), open(path + '.idx', 'rb')]
+        self._maps = [mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if f.seek(0, 2) else b''
+                      for f in self._files]
+        self.buffer = memoryview(self._maps[0])
+
+        magic, version, little, _ = FILE_HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not a game record file' % path)
+        if little != (sys.byteorder == 'little'):
+            raise ValueError('%s was written on a machine with another byte order' % path)
+
+        self.offsets = memoryview(self._maps[1]).cast('Q')
+        self._views = weakref.WeakValueDictionary()  # id -> view into the mapped file (see close)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        """Returns the GameRecord of game i."""
+        return GameRecord(self.buffer, self.offsets[i], self._views)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def move(self, i, k):
+        """Returns move k of game i, see GameRecord.move."""
+        return self[i].move(k)
+
+    def close(self):
+        # mmap.close fails while a view into the file exists
+        for view in list(self._views.values()):
+            view.release()
+        self.offsets.release()
+        self.buffer.release()
+        for m in self._maps:
+            if isinstance(m, mmap.mmap):
+                m.close()
+        for f in self._files:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains an asyncio server that hosts many games at once.
+
+Clients talk to the server over TCP with one JSON object per line. Every
+request may carry an "id" that is copied into the response.
+
+    {"op": "create", "size": 19, "role": "black"}   -> {"ok": true, "game": 1}
+        the creator joins the game (default as spectator)
+    {"op": "join", "game": 1, "role": "black"}      -> {"ok": true, "state": {...}}
+        role is "black", "white" or "spectator", state is the full board
+    {"op": "play", "game": 1, "x": 3, "y": 3}       -> {"ok": true}
+    {"op": "pass", "game": 1}                       -> {"ok": true}
+    {"op": "leave", "game": 1}                      -> {"ok": true}
+
+After every move the changed fields are pushed to all players and
+spectators of the game:
+
+    {"event": "update", "game": 1, "version": 5, "stones": [[x, y, "B"], ...],
+     "territory": [...], "color": "W", "score": [0, 0], "game_over": false}
+
+A game ends after both players passed or after max_moves moves and is
+removed when nobody is connected to it anymore.
+
+    python3 server.py --port 8765
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+
+from game_model import Model
+from geometry import check_size
+
+BLACK = True
+WHITE = False
+
+COLORS = {None: None, BLACK: 'B', WHITE: 'W'}
+ROLES = {'black': BLACK, 'white': WHITE}
+
+MAX_LINE = 1 << 12  # longest request
+MAX_BUFFER = 1 << 20  # clients that do not read their updates are dropped
+
+
+def encode_state(data):
+    """Converts the data of Model.get_changes to JSON compatible values.
+
+    Returns:
+        (dict): fields as [x, y, color] lists, colors as 'B', 'W' or None
+    """
+    if data['full']:
+        stones = [[x, y, COLORS[color]] for y, row in enumerate(data['stones'])
+                  for x, color in enumerate(row) if color is not None]
+        territory = [[x, y, COLORS[color]] for y, row in enumerate(data['territory'])
+                     for x, color in enumerate(row) if color is not None]
+    else:
+        stones = [[x, y, COLORS[color]] for (x, y), color in data['stones'].items()]
+        territory = [[x, y, COLORS[color]] for (x, y), color in data['territory'].items()]
+    return {'version': data['version'], 'full': data['full'], 'size': data['size'],
+            'stones': stones, 'territory': territory, 'color': COLORS[data['color']],
+            'score': list(data['score']), 'game_over': data['game_over']}
+
+
+class Game:
+    """A game hosted by the server.
+
+    The server has no undo, so the model keeps no move history (history=False).
+    A finished random 19x19 game then holds about 75 kB instead of about
+    880 kB with the history ('no history' and 'game' of python3 -m
+    benchmarks.memory).
+
+    Attributes:
+        model (Model)     : the game
+        played (int)      : number of accepted moves and passes
+        players (dict)    : color -> Connection
+        watchers (set)    : all connections that receive the updates
+        version (int)     : version of the model that was pushed last
+        scored (bool)     : the territory of the finished game has been found
+    """
+
+    def __init__(self, game_id, size, max_moves):
+        self.id = game_id
+        self.model = Model(size, history=False)
+        self.played = 0
+        self.max_moves = max_moves
+        self.players = {}
+        self.watchers = set()
+        self.version = self.model.version
+        self.scored = False
+
+    def push(self):
+        """Sends the changes since the last push to all watchers (after every
+        accepted move or pass)."""
+        model = self.model
+        self.played += 1
+        if not model.game_over and self.played >= self.max_moves:
+            while not model.game_over:
+                model.passing()
+        if model.game_over and not self.scored:
+            model.find_territory()
+            self.scored = True
+
+        message = encode_state(model.get_changes(self.version))
+        self.version = model.version
+        message['event'] = 'update'
+        message['game'] = self.id
+        line = (json.dumps(message, separators=(',', ':')) + '\n').encode()
+        for connection in list(self.watchers):
+            connection.send_raw(line)
+
+
+class Connection:
+    """A connected client."""
+
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.games = {}  # game id -> set of roles
+
+    def send(self, message):
+        self.send_raw((json.dumps(message, separators=(',', ':')) + '\n').encode())
+
+    def send_raw(self, line):
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            self.writer.close()
+            return
+        self.writer.write(line)
+
+
+class GameServer:
+    """Hosts independent games and dispatches the requests of the clients.
+
+    Attributes:
+        games (dict): game id -> Game
+        moves (int) : number of accepted moves and passes
+    """
+
+    def __init__(self, max_moves_factor=3):
+        """
+        Arguments:
+            max_moves_factor (int): a game ends after factor * size * size moves
+        """
+        self.games = {}
+        self.ids = itertools.count(1)
+        self.max_moves_factor = max_moves_factor
+        self.moves = 0
+
+    async def handle(self, reader, writer):
+        """Serves one client until it disconnects."""
+        connection = Connection(self, writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break  # closed or line too long
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    response = self.dispatch(connection, request)
+                except (ValueError, KeyError, IndexError, TypeError, AttributeError) as error:
+                    response = {'ok': False, 'error': str(error)}
+                if isinstance(request, dict) and 'id' in request:
+                    response['id'] = request['id']
+                connection.send(response)
+                if writer.transport.get_write_buffer_size() > MAX_BUFFER // 2:
+                    await writer.drain()
+        finally:
+            for game_id in list(connection.games):
+                self._leave(connection, game_id)
+            writer.close()
+
+    def dispatch(self, connection, request):
+        """Executes one request.
+
+        Returns:
+            (dict): response for the client
+        """
+        op = request['op']
+        if op == 'create':
+            size = check_size(int(request.get('size', 19)))
+            game = Game(next(self.ids), size, self.max_moves_factor * size * size)
+            self._join(connection, game, request.get('role', 'spectator'))
+            self.games[game.id] = game
+            return {'ok': True, 'game': game.id}
+
+        game = self.games.get(request['game'])
+        if game is None:
+            raise ValueError('unknown game')
+
+        if op == 'join':
+            role = request.get('role', 'spectator')
+            self._join(connection, game, role)
+            return {'ok': True, 'game': game.id, 'role': role,
+                    'state': encode_state(game.model.get_changes(None))}
+
+        if op == 'leave':
+            self._leave(connection, game.id)
+            return {'ok': True}
+
+        if op in ('play', 'pass'):
+            model = game.model
+            if game.players.get(model.turn) is not connection:
+                raise ValueError('not your turn')
+            if op == 'play':
+                x, y = int(request['x']), int(request['y'])
+                if not (0 <= x < model.size and 0 <= y < model.size):
+                    raise ValueError('field outside the board')
+                ok = model.place_stone(x, y)
+            else:
+                ok = model.passing()
+            if ok:
+                self.moves += 1
+                game.push()
+            return {'ok': ok}
+
+        raise ValueError('unknown op')
+
+    def _join(self, connection, game, role):
+        if role in ROLES:
+            color = ROLES[role]
+            if game.players.get(color, connection) is not connection:
+                raise ValueError('%s is already taken' % role)
+            game.players[color] = connection
+        elif role != 'spectator':
+            raise ValueError('unknown role')
+        game.watchers.add(connection)
+        connection.games.setdefault(game.id, set()).add(role)
+
+    def _leave(self, connection, game_id):
+        game = self.games.get(game_id)
+        connection.games.pop(game_id, None)
+        if game is None:
+            return
+        game.watchers.discard(connection)
+        for color, player in list(game.players.items()):
+            if player is connection:
+                del game.players[color]
+        if not game.watchers:
+            del self.games[game_id]
+
+
+async def serve(host='127.0.0.1', port=8765, server=None):
+    """Starts the server.
+
+    Returns:
+        (asyncio.Server): the listening server (GameServer is server.game_server)
+    """
+    server = server or GameServer()
+    listener = await asyncio.start_server(server.handle, host, port, limit=MAX_LINE)
+    listener.game_server = server
+    return listener
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Go server for many concurrent games.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    async def run():
+        listener = await serve(args.host, args.port)
+        print('serving on %s:%d' % (args.host, args.port))
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module reads and writes games in the Smart Game Format (SGF).
+
+Files are read in chunks and the games of a collection are yielded one
+after another, so large archives never have to be held in memory. Only
+the main line of a game tree is followed (the first variation).
+
+Coordinates: the SGF field 'aa' is the top left corner, the Model uses
+y = 0 for the bottom row (as drawn by the GUI), so the rows are flipped.
+
+    python3 sgf.py replay archive.sgf [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import re
+import sys
+import time
+
+from game_model import Model
+
+BLACK = True
+WHITE = False
+
+CHUNK_SIZE = 1 << 16
+
+_TOKEN = re.compile(r'\s*(?:([();])|([A-Za-z]+)\s*((?:\[(?:[^\]\\]|\\.)*\]\s*)+))', re.S)
+_VALUE = re.compile(r'\[((?:[^\]\\]|\\.)*)\]', re.S)
+_ESCAPE = re.compile(r'\\(\r\n|\n\r|\n|\r|.)', re.S)
+_INCOMPLETE = re.compile(r'\s*(?:\[|$)')
+
+
+def _unescape(value):
+    return _ESCAPE.sub(lambda m: '' if m.group(1) in ('\n', '\r', '\r\n', '\n\r') else m.group(1), value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace(']', '\\]')
+
+
+def _tokens(stream):
+    """Splits an SGF stream into tokens.
+
+    Yields:
+        (tuple): ('(',), (')',), (';',) or ('prop', identifier, [values])
+    """
+    buf = ''
+    pos = 0
+    eof = False
+    while True:
+        match = _TOKEN.match(buf, pos)
+        if not eof and (match is None or match.group(2) and _INCOMPLETE.match(buf, match.end())):
+            # the token might continue in the next chunk
+            chunk = stream.read(CHUNK_SIZE)
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            continue
+        if match is None:
+            if buf[pos:].strip():
+                raise ValueError('Invalid SGF near: %r' % buf[pos:pos + 20])
+            return
+        pos = match.end()
+        if match.group(1):
+            yield (match.group(1),)
+        else:
+            ident = ''.join(c for c in match.group(2) if c.isupper())
+            yield ('prop', ident, [_unescape(v) for v in _VALUE.findall(match.group(3))])
+
+
+def _trees(stream):
+    """Collects the nodes of the main line of every game tree.
+
+    Yields:
+        (list): nodes as dicts {identifier: [values]}
+    """
+    depth = 0
+    skip = 0  # depth of a variation that is skipped (0: none)
+    has_child = []  # per depth: the first variation has been entered
+    nodes = []
+    node = None
+
+    for token in _tokens(stream):
+        kind = token[0]
+        if kind == '(':
+            depth += 1
+            has_child.append(False)
+            if skip:
+                continue
+            if depth > 1:
+                if has_child[depth - 2]:
+                    skip = depth
+                else:
+                    has_child[depth - 2] = True
+        elif kind == ')':
+            if depth == 0:
+                raise ValueError('Invalid SGF: unbalanced parentheses')
+            has_child.pop()
+            if skip == depth:
+                skip = 0
+            depth -= 1
+            if depth == 0:
+                yield nodes
+                nodes = []
+        elif skip:
+            continue
+        elif kind == ';':
+            node = {}
+            nodes.append(node)
+        elif node is not None:
+            node.setdefault(token[1], []).extend(token[2])
+
+    if depth:
+        raise ValueError('Invalid SGF: unexpected end of file')
+
+
+def _coordinates(value, n):
+    """Converts an SGF point to (x, y), which may be off the board (see
+    _on_board).
+
+    Raises:
+        ValueError: if the value is not two letters a-z
+    """
+    if len(value) != 2 or not ('a' <= value[0] <= 'z' and 'a' <= value[1] <= 'z'):
+        raise ValueError('Invalid SGF point: %r' % value)
+    return ord(value[0]) - ord('a'), n - 1 - (ord(value[1]) - ord('a'))
+
+
+def _point(value, n):
+    """Converts an SGF move to (x, y) or None for a pass, see _coordinates."""
+    if value == '' or (value == 'tt' and n <= 19):
+        return None
+    return _coordinates(value, n)
+
+
+def _points(value, n):
+    """Converts an SGF point or a compressed point list 'aa:bb' (a
+    rectangle) to a list of (x, y), see _coordinates. A single 'tt' or
+    empty value is a pass and gives no point. A rectangle with a corner off
+    the board is not expanded, only the corners off the board are returned."""
+    first, colon, last = value.partition(':')
+    if not colon:
+        pos = _point(value, n)
+        return [] if pos is None else [pos]
+    corners = [_coordinates(first, n), _coordinates(last, n)]
+    outside = [pos for pos in corners if not _on_board(pos, n)]
+    if outside:
+        return outside
+    (x1, y1), (x2, y2) = corners
+    return [(x, y) for y in range(max(y1, y2), min(y1, y2) - 1, -1)
+            for x in range(min(x1, x2), max(x1, x2) + 1)]
+
+
+def _on_board(pos, n):
+    x, y = pos
+    return 0 <= x < n and 0 <= y < n
+
+
+def _value(pos, n):
+    """Converts (x, y) or None (pass) to an SGF point."""
+    if pos is None:
+        return ''
+    x, y = pos
+    return chr(ord('a') + x) + chr(ord('a') + n - 1 - y)
+
+
+def iter_games(source):
+    """Reads the games of an SGF collection one by one.
+
+    Arguments:
+        source: file name or readable text stream
+
+    Yields:
+        (dict): 'size' (int), 'properties' of the root node,
+                'setup' [(color, (x, y))] from AB/AW and
+                'moves' [(color, (x, y) or None for a pass)]
+    """
+    if isinstance(source, str):
+        with open(source, encoding='utf-8', errors='replace') as stream:
+            for game in iter_games(stream):
+                yield game
+        return
+
+    for nodes in _trees(source):
+        if nodes:
+            yield _game(nodes)
+
+
+def _game(nodes):
+    """Converts the nodes of a game tree (see _trees) to a game of iter_games.
+
+    Raises:
+        ValueError: for an invalid size or point
+    """
+    root = nodes[0]
+    try:
+        size = int(root.get('SZ', ['19'])[0].split(':')[0])
+    except ValueError:
+        raise ValueError('Invalid SGF size: %r' % root['SZ'][0])
+
+    setup = []
+    moves = []
+    for node in nodes:
+        for ident, color in (('AB', BLACK), ('AW', WHITE)):
+            for value in node.get(ident, []):
+                setup.extend((color, pos) for pos in _points(value, size))
+        for ident, color in (('B', BLACK), ('W', WHITE)):
+            for value in node.get(ident, []):
+                moves.append((color, _point(value, size)))
+
+    return {'size': size, 'properties': root, 'setup': setup, 'moves': moves}
+
+
+def place_setup(model, setup):
+    """Puts setup stones (AB/AW, e.g. handicap) on an empty board.
+
+    The stones are placed with place_stone, but they are not kept as moves:
+    Model.moves starts after the setup (undo stops there, as for a clone)
+    and the stones are stored in model.setup, so that dumps writes them
+    back as AB/AW.
+
+    Arguments:
+        model (Model): the model, before the first move
+        setup (list) : [(color, (x, y))]
+
+    Returns:
+        (list): the stones that are off the board or could not be placed
+    """
+    n = model.size
+    illegal = []
+    for color, pos in setup:
+        model.turn = color
+        if not _on_board(pos, n) or not model.place_stone(*pos):
+            illegal.append((color, pos))
+    model.setup = [(move.color, move.pos) for move in model.moves]
+    model.moves = []
+    model.undone = []
+    model.blocked_field = None
+    model.has_passed = False
+    model.seen = {model.hash}
+    return illegal
+
+
+def replay(game, model=None):
+    """Plays a game read by iter_games with place_stone and passing.
+
+    Setup stones (handicap) are placed first (see place_setup). If the
+    color of a move is not the color to move, the turn is handed over first.
+    Illegal moves and points off the board are skipped.
+
+    Arguments:
+        game (dict)  : game from iter_games
+        model (Model): model to play on (default: new Model of the game's size)
+
+    Returns:
+        (tuple): the model and a list of illegal moves (move number, color, (x, y)),
+                 move number 0 for setup stones
+    """
+    if model is None:
+        model = Model(game['size'])
+
+    illegal = []
+    if game['setup']:
+        illegal.extend((0, color, pos) for color, pos in place_setup(model, game['setup']))
+        player = game['properties'].get('PL', [None])[0]
+        if player is not None:
+            model.turn = player.upper().startswith('B')
+        else:
+            model.turn = not all(color for color, _ in game['setup'])
+
+    n = model.size
+    for number, (color, pos) in enumerate(game['moves'], 1):
+        model.turn = color
+        if pos is None:
+            if not model.passing():
+                illegal.append((number, color, pos))
+        elif not _on_board(pos, n) or not model.place_stone(*pos):
+            illegal.append((number, color, pos))
+    return model, illegal
+
+
+def dumps(model, **properties):
+    """Serializes the moves of a game to SGF.
+
+    Arguments:
+        model (Model)   : the game (the setup stones of place_setup as AB/AW
+                          and Model.moves)
+        **properties    : further root properties, e.g. PB='Alice', RE='B+3'
+
+    Returns:
+        (str): SGF game tree
+    """
+    n = model.size
+    root = {'FF': 4, 'GM': 1, 'SZ': n}
+    root.update(properties)
+
+    parts = ['(;' + ''.join('%s[%s]' % (ident, _escape(value)) for ident, value in root.items())]
+    setup = getattr(model, 'setup', ())
+    for ident, color in (('AB', BLACK), ('AW', WHITE)):
+        points = [_value(pos, n) for c, pos in setup if c == color]
+        if points:
+            parts.append('%s[%s]' % (ident, ']['.join(points)))
+    for move in model.moves:
+        parts.append(';%s[%s]' % ('B' if move.color == BLACK else 'W', _value(move.pos, n)))
+    parts.append(')\n')
+    return ''.join(parts)
+
+
+def write_games(models, target):
+    """Writes several games to one SGF collection.
+
+    Arguments:
+        models (iterable): Model objects
+        target           : file name or writable text stream
+    """
+    if isinstance(target, str):
+        with open(target, 'w', encoding='utf-8') as stream:
+            write_games(models, stream)
+        return
+
+    for model in models:
+        target.write(dumps(model))
+
+
+def _replay_game(args):
+    """Parses, replays and scores a game in a worker process.
+
+    Arguments:
+        args (tuple): game index and the nodes of the game tree (see _trees)
+
+    Returns:
+        (tuple): game index, number of moves, illegal moves and [white, black]
+                 score, or game index, 0, the error message and None if the
+                 game cannot be read or replayed (e.g. an invalid point or a
+                 board size that is not supported)
+    """
+    index, nodes = args
+    try:
+        game = _game(nodes)
+        model, illegal = replay(game)
+    except ValueError as error:
+        return index, 0, str(error), None
+    while not model.game_over:
+        model.passing()
+    model.find_territory()
+    return index, len(game['moves']), illegal, model.get_data()['score']
+
+
+def replay_files(sources, workers=1, out=sys.stdout):
+    """Replays all games of the files and reports the illegal moves.
+
+    The games are parsed in the workers, a game that cannot be read is
+    reported and counted as failed. A file that is not valid SGF (e.g.
+    unbalanced parentheses) is reported and the next file is read.
+
+    Returns:
+        (dict): games, moves, illegal (number of games with illegal moves),
+                failed (number of games that could not be replayed),
+                seconds and games_per_sec
+    """
+    counts = {'games': 0, 'moves': 0, 'illegal': 0, 'failed': 0}
+
+    def trees():
+        for source in sources:
+            if isinstance(source, str):
+                stream = open(source, encoding='utf-8', errors='replace')
+            else:
+                stream = source
+            try:
+                for nodes in _trees(stream):
+                    if nodes:
+                        yield nodes
+            except ValueError as error:
+                out.write('%s: %s\n' % (getattr(stream, 'name', source), error))
+            finally:
+                if stream is not source:
+                    stream.close()
+
+    def jobs():
+        for index, nodes in enumerate(trees()):
+            yield index, nodes
+
+    start = time.perf_counter()
+    if workers > 1:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap(_replay_game, jobs(), chunksize=64)
+    else:
+        pool = None
+        results = map(_replay_game, jobs())
+
+    for index, moves, illegal, score in results:
+        counts['games'] += 1
+        counts['moves'] += moves
+        if score is None:
+            counts['failed'] += 1
+            out.write('game %d: %s\n' % (index + 1, illegal))
+        elif illegal:
+            counts['illegal'] += 1
+            for number, color, pos in illegal:
+                out.write('game %d: illegal move %d (%s %s)\n' % (
+                    index + 1, number, 'B' if color == BLACK else 'W', 'pass' if pos is None else pos))
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    counts['seconds'] = time.perf_counter() - start
+    counts['games_per_sec'] = counts['games'] / counts['seconds'] if counts['seconds'] else 0.
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SGF tools for Project Go.')
+    commands = parser.add_subparsers(dest='command')
+    replay_parser = commands.add_parser('replay', help='replay and validate SGF files')
+    replay_parser.add_argument('files', nargs='+')
+    replay_parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command != 'replay':
+        parser.print_help()
+        return
+
+    stats = replay_files(args.files, args.workers)
+    print('%d games, %d moves, %d with illegal moves, %d failed, %.1f games/s (%.2f s)' % (
+        stats['games'], stats['moves'], stats['illegal'], stats['failed'], stats['games_per_sec'],
+        stats['seconds']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module plays games without a GUI. It drives the Model directly with
+place_stone and passing, scores the finished games with find_territory and
+spreads the games over a multiprocessing pool.
+
+    python3 simulate.py --games 1000 --size 9 --workers 4
+
+A policy is a function policy(model, rng) that returns the moves it would
+like to play in order of preference. The first one that is accepted by
+place_stone is played, if none is accepted (or the list is empty) the
+player passes. Policies have to be defined on module level so that they
+can be sent to the worker processes.
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+
+from game_model import Model
+
+BLACK = True
+WHITE = False
+
+
+def is_eye(model, x, y):
+    """Checks if the empty field (x, y) is surrounded by stones of the
+    player to move only.
+
+    Returns:
+        (bool): True if all neighbouring fields belong to the player to move
+    """
+    board = model.board
+    for q in model.neighbours[y * model.size + x]:
+        grp = board[q]
+        if grp is None or grp.color != model.turn:
+            return False
+    return True
+
+
+def random_policy(model, rng):
+    """Plays on a random empty field but never fills its own eyes, so that
+    the game comes to an end.
+
+    Returns:
+        (list): shuffled list of candidate moves
+    """
+    moves = [pos for pos, grp in zip(model.coords, model.board)
+             if grp is None and not is_eye(model, *pos)]
+    rng.shuffle(moves)
+    return moves
+
+
+def play_out(model, policy=random_policy, rng=None, max_moves=None):
+    """Continues the game on model until both players pass.
+
+    Arguments:
+        model (Model)     : the game, it is changed in place
+        policy (function) : policy(model, rng) used for both players
+        rng (Random)      : random generator passed to the policy
+        max_moves (int)   : the game is ended after that many moves
+                            (default 3 * size * size)
+
+    Returns:
+        (int): number of moves (including passes) that were played
+    """
+    if rng is None:
+        rng = random.Random()
+    if max_moves is None:
+        max_moves = 3 * model.size * model.size
+
+    moves = 0
+    while not model.game_over and moves < max_moves:
+        for x, y in policy(model, rng):
+            if model.place_stone(x, y):
+                break
+        else:
+            model.passing()
+        moves += 1
+
+    while not model.game_over:
+        model.passing()
+        moves += 1
+    return moves
+
+
+def winner(model, komi=0):
+    """Determines the winner of a scored game.
+
+    Returns:
+        (bool or None): BLACK, WHITE or None for a draw
+    """
+    data = model.get_data()
+    diff = data['score'][BLACK] - data['score'][WHITE] - komi
+    if diff > 0:
+        return BLACK
+    if diff < 0:
+        return WHITE
+    return None
+
+
+def play_game(size=9, policy=random_policy, seed=None, max_moves=None):
+    """Plays one game until both players pass.
+
+    Arguments:
+        size (int)        : size of the board
+        policy (function) : policy(model, rng) used for both players
+        seed (int)        : seed of the random generator
+        max_moves (int)   : the game is ended after that many moves
+                            (default 3 * size * size)
+
+    Returns:
+        (tuple): the finished and scored model and the number of moves
+    """
+    model = Model(size)
+    moves = play_out(model, policy, random.Random(seed), max_moves)
+    model.find_territory()
+    return model, moves
+
+
+def _play_chunk(args):
+    """Plays a number of games in a worker process.
+
+    Returns:
+        (list): (black score, white score, number of moves) per game
+    """
+    size, policy, seeds, max_moves = args
+    results = []
+    for seed in seeds:
+        model, moves = play_game(size, policy, seed, max_moves)
+        data = model.get_data()
+        results.append((data['score'][BLACK], data['score'][WHITE], moves))
+    return results
+
+
+def simulate(n_games, size=9, policy=random_policy, workers=None, seed=0, max_moves=None):
+    """Plays n_games games and reports the results and the throughput.
+
+    Arguments:
+        n_games (int)     : number of games to play
+        size (int)        : size of the board
+        policy (function) : policy(model, rng) used for both players
+        workers (int)     : number of processes (default: number of cpus),
+                            with 1 no pool is created
+        seed (int)        : seed of the first game, game i uses seed + i
+        max_moves (int)   : maximal number of moves per game
+
+    Returns:
+        (dict): results (list of (black, white, moves)), black/white wins,
+                draws, moves, seconds, games_per_sec and moves_per_sec
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    workers = max(1, min(workers, n_games))
+
+    seeds = list(range(seed, seed + n_games))
+    chunks = [(size, policy, seeds[i::workers], max_moves) for i in range(workers)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        chunk_results = [_play_chunk(chunks[0])]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            chunk_results = pool.map(_play_chunk, chunks)
+    seconds = time.perf_counter() - start
+
+    results = [r for chunk in chunk_results for r in chunk]
+    moves = sum(r[2] for r in results)
+    return {
+        'results': results,
+        'black': sum(1 for r in results if r[0] > r[1]),
+        'white': sum(1 for r in results if r[1] > r[0]),
+        'draws': sum(1 for r in results if r[0] == r[1]),
+        'moves': moves,
+        'seconds': seconds,
+        'games_per_sec': len(results) / seconds,
+        'moves_per_sec': moves / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays random games without a GUI.')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    stats = simulate(args.games, args.size, workers=args.workers, seed=args.seed)
+    print('%d games on %dx%d: black %d, white %d, draws %d' % (
+        args.games, args.size, args.size, stats['black'], stats['white'], stats['draws']))
+    print('%.1f games/s, %.0f moves/s (%.2f s)' % (
+        stats['games_per_sec'], stats['moves_per_sec'], stats['seconds']))
+
+
+if __name__ == '__main__':
+    main()
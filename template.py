@@ -9,12 +9,16 @@ The game Model needs to inherit from Terr_Template if it does not
 implement those methods itself.
 """
 
+from geometry import coordinate_table
+
 BLACK = True
 WHITE = False
 
 class Terr_Template:
     """This class does not work on its own but can be inherited from by
-    the Model."""
+    the Model. The Model has to provide a flat board (self.board[y * size + x]
+    holds the Group or None) and the neighbour table of its size
+    (self.neighbours, see geometry.neighbour_table)."""
 
     def find_territory(self):
         """Tries to automatically claim territory for the proper players.
@@ -23,26 +27,33 @@ class Terr_Template:
             It just claims empty areas that are completely surrounded
             by one color.
             Therefore it will not recognise prisoners or dead groups.
+            Every field is visited once (iterative flood fill with a
+            visited bitmap).
 
         Attributes updated by this function:
             self.score
             self.territory
         """
-        area = []
-        for y in range(self.size):
-            for x in range(self.size):
+        n = self.size
+        board = self.board
+        coords = coordinate_table(n)
+        visited = bytearray(n * n)
+        for p in range(n * n):
 
-                if (x, y) in area:
-                    continue
+            if visited[p] or board[p] is not None:
+                continue
 
-                if self.board[y][x] is None:
-                    _a, count = self._find_empty(x, y, area=area)
-                    area += _a
+            area, count = self._find_empty(p, visited)
 
-                    if count[BLACK] == 0 and count[WHITE] > 0:
-                        self._claim_empty(x, y, WHITE)
-                    elif count[WHITE] == 0 and count[BLACK] > 0:
-                        self._claim_empty(x, y, BLACK)
+            if count[BLACK] == 0 and count[WHITE] > 0:
+                color = WHITE
+            elif count[WHITE] == 0 and count[BLACK] > 0:
+                color = BLACK
+            else:
+                continue
+            for q in area:
+                x, y = coords[q]
+                self._set_territory(x, y, color)
 
         self._compute_score()
 
@@ -63,88 +74,120 @@ class Terr_Template:
         if not self.game_over:
             return
 
-        if self.board[y][x] is None:
+        p = y * self.size + x
+        if self.board[p] is None:
             col_dict = {None: BLACK, BLACK: WHITE, WHITE: None}
             color = col_dict[self.territory[y][x]]
-            self._claim_empty(x, y, color)
+            self._claim_empty(p, color)
         else:
             if self.territory[y][x] is None:
-                color = not self.board[y][x].color
+                color = not self.board[p].color
             else:
                 color = None
-            self._claim_group(x, y, color)
+            self._claim_group(p, color)
 
         self._compute_score()
 
-    def _claim_empty(self, x, y, color, area=None):
-        if area is None:
-            area = []
-
-        if self.board[y][x] is not None or (x, y) in area:
-            return
-
-        area.append((x, y))
+    def _set_territory(self, x, y, color):
+        """Marks the field (x, y) as territory of color (or None). The Model
+        can override this to keep track of the changed fields.
+        """
         self.territory[y][x] = color
 
-        for (u, v) in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
-            if u < 0 or v < 0 or u >= self.size or v >= self.size:
-                continue
+    def _claim_empty(self, p, color, visited=None):
+        """Claims the empty area containing the field p for color.
 
-            if (u, v) not in area and self.board[v][u] is None:
-                self._claim_empty(u, v, color, area=area)
+        Arguments:
+            p (int)             : index y * size + x of an empty field
+            color (bool)        : BLACK, WHITE or None
+            visited (bytearray) : fields that have already been claimed
+        """
+        if self.board[p] is not None:
+            return
 
-    def _claim_group(self, x, y, color, area=None):
-        if area is None:
-            area = []
-        for u, v in self.board[y][x].stones:
-            if (u, v) not in area:
-                area.append((u, v))
-                self.territory[v][u] = color
-        for u, v in self.board[y][x].border:
-            if self.board[v][u] is None and (u, v) not in area:
-                self._claim_empty(u, v, color, area=area)
+        coords = coordinate_table(self.size)
+        area, _ = self._find_empty(p, visited)
+        for q in area:
+            x, y = coords[q]
+            self._set_territory(x, y, color)
+
+    def _claim_group(self, p, color):
+        n = self.size
+        board = self.board
+        neighbours = self.neighbours
+        coords = coordinate_table(n)
+        visited = bytearray(n * n)
+        grp = board[p]
+        for q in grp.stones:
+            x, y = coords[q]
+            self._set_territory(x, y, color)
+        for q in grp.stones:
+            for r in neighbours[q]:
+                if board[r] is None and not visited[r]:
+                    self._claim_empty(r, color, visited)
 
     def _compute_score(self):
         self.score = [0, 0]
-        for j in range(self.size):
-            for i in range(self.size):
+        n = self.size
+        for j in range(n):
+            for i in range(n):
                 if self.territory[j][i] == BLACK:
                     self.score[BLACK] += 1
-                    if self.board[j][i] is not None:
+                    if self.board[j * n + i] is not None:
                         self.score[BLACK] += 1
                 elif self.territory[j][i] == WHITE:
                     self.score[WHITE] += 1
-                    if self.board[j][i] is not None:
+                    if self.board[j * n + i] is not None:
                         self.score[WHITE] += 1
 
-    def _find_empty(self, x, y, area=None, count=None):
-        if area is None:
-            area = []
-        if count is None:
-            count = [0, 0]
+    def _find_empty(self, p, visited=None):
+        """Collects the empty area containing the field p and counts the
+        adjacent stones of each color.
 
-        if self.board[y][x] is not None or (x, y) in area:
+        Arguments:
+            p (int)             : index y * size + x of an empty field
+            visited (bytearray) : fields that were already visited, they
+                                  are skipped and the area is added
+
+        Returns:
+            (tuple): list of the fields (indices) of the area and
+                     [white, black] count of adjacent stones
+        """
+        board = self.board
+        neighbours = self.neighbours
+        if visited is None:
+            visited = bytearray(self.size * self.size)
+
+        area = []
+        count = [0, 0]
+        if board[p] is not None or visited[p]:
             return area, count
-        area.append((x, y))
-        for (u, v) in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
-            if u < 0 or v < 0 or u >= self.size or v >= self.size:
-                continue
-            if (u, v) not in area:
-                if self.board[v][u] is None:
-                    self._find_empty(u, v, area=area, count=count)
-                else:
-                    count[self.board[v][u].color] += 1
+
+        visited[p] = 1
+        stack = [p]
+        while stack:
+            p = stack.pop()
+            area.append(p)
+            for q in neighbours[p]:
+                grp = board[q]
+                if grp is not None:
+                    count[grp.color] += 1
+                elif not visited[q]:
+                    visited[q] = 1
+                    stack.append(q)
         return area, count
 
 
 class Group:
     """Represents a group of connected stones on the board.
 
+    Fields are given by their index p = y * size + x on the board.
+
     Attributes:
-        stones (set): list of all coordinates where the group has a stone
-        border (set): list of all fields that are adjacent to the group
-                      For a new group empty fields must be added manually
-                      since the group does not know about the field size
+        stones (set): all fields where the group has a stone
+        liberties (set): all empty fields adjacent to the group. It is kept
+                         up to date by the Model when stones are placed
+                         next to the group or neighbouring groups get killed
         color (bool): color of the group
 
     Property:
@@ -152,6 +195,8 @@ class Group:
                     the group.
     """
 
+    __slots__ = ('stones', 'liberties', 'color')
+
     def __init__(self, stones=None, color=None):
         """
         Initialise group
@@ -161,13 +206,13 @@ class Group:
         else:
             self.stones = set()
 
-        self.border = set()
+        self.liberties = set()
         self.color = color
 
     def __add__(self, other):
         """To add two groups of the same color
-        The new group contains all the stones of the previous groups and
-        the border will be updated correctly.
+        The new group contains all the stones and liberties of the
+        previous groups.
 
         Raises:
             TypeError: The colours of the groups do not match
@@ -176,7 +221,18 @@ class Group:
             raise ValueError('Only groups of same colour can be added!')
         grp = Group(stones=self.stones.union(other.stones))
         grp.color = self.color
-        grp.border = self.border.union(other.border).difference(grp.stones)
+        grp.liberties = self.liberties.union(other.liberties).difference(grp.stones)
+        return grp
+
+    def copy(self):
+        """Copy of the group with its own set of liberties. The stones
+        are shared since they do not change after the group has been
+        created.
+        """
+        grp = Group.__new__(Group)
+        grp.stones = self.stones
+        grp.liberties = set(self.liberties)
+        grp.color = self.color
         return grp
 
     @property
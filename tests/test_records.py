@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the game record files (records.py).
+
+    python3 -m pytest tests
+"""
+
+import pytest
+
+from game_model import Model
+from records import RecordReader, RecordWriter
+
+
+def _game():
+    model = Model(9)
+    for x, y in ((2, 2), (6, 6), (2, 6), (6, 2)):
+        model.place_stone(x, y)
+    model.passing()
+    model.passing()
+    return model
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'games.rec')
+    with RecordWriter(path, interval=2) as writer:
+        writer.extend([_game(), _game()])
+    return path
+
+
+def test_iterate_then_close(path):
+    count = 0
+    with RecordReader(path) as reader:
+        for game in reader:
+            count += len(game)
+    assert count == 12
+
+
+def test_close_releases_handed_out_views(path):
+    with RecordReader(path) as reader:
+        game = reader[1]
+        snapshot = game.snapshot(0)
+        kept = bytes(snapshot)
+        assert game.move(0) == (True, (2, 2))
+    assert kept
+    with pytest.raises(ValueError):
+        game.move(0)
+    with pytest.raises(ValueError):
+        bytes(snapshot)
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module plays round-robin tournaments between computer players.
+
+Every pair of players plays --games games, the colors alternate from game
+to game. The games are spread over a process pool, a game that does not
+end after 3 * size * size moves is ended with two passes. Finished games
+are scored with find_territory (and komi) and appended to a JSON lines
+file at once, so a run that was stopped can be resumed with the same
+command: games that are already in the file are not played again.
+
+    python3 tournament.py --player random --player mcts:playouts=200 \\
+        --player mcts:playouts=800 --games 20 --size 9 --workers 4 --out results.jsonl
+
+A player is given as kind[:key=value,...]. The kinds are 'random'
+(simulate.random_policy), 'mcts' (mcts.MCTSPlayer) or 'module:attribute'
+of a factory that returns an object with genmove(model), e.g.
+'mypolicies:GreedyPlayer:depth=2'. The players are created in the worker
+processes (which cannot start processes themselves, so mcts players keep
+workers=1) and reseeded for every game.
+
+At the end the Elo ratings (Bradley-Terry maximum likelihood, draws count
+as half a win, mean 0) with 95 % confidence intervals (standard errors of
+the fit), the games per hour and the average time per move of every
+player are reported.
+"""
+
+import argparse
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+import zlib
+
+from game_model import Model
+from simulate import random_policy, winner
+
+BLACK = True
+WHITE = False
+
+_PLAYERS = {}  # spec -> player, per process
+
+
+class RandomPlayer:
+    """Plays random moves that do not fill an own eye (simulate.random_policy)."""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def genmove(self, model):
+        for pos in random_policy(model, self.rng):
+            if model.is_legal(*pos):
+                return pos
+        return None
+
+
+def _value(text):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def make_player(spec):
+    """Creates a player from its description (see the module docstring).
+
+    Arguments:
+        spec (str): e.g. 'random', 'mcts:playouts=200,c=1.0' or 'module:Class:key=value'
+
+    Returns:
+        an object with genmove(model)
+    """
+    parts = spec.split(':')
+    kwargs = {}
+    if '=' in parts[-1]:
+        for item in parts.pop().split(','):
+            key, _, value = item.partition('=')
+            kwargs[key.strip()] = _value(value.strip())
+
+    if parts == ['random']:
+        return RandomPlayer(**kwargs)
+    if parts == ['mcts']:
+        from mcts import MCTSPlayer
+        return MCTSPlayer(**kwargs)
+    if len(parts) == 2:
+        return getattr(importlib.import_module(parts[0]), parts[1])(**kwargs)
+    raise ValueError('unknown player: %s' % spec)
+
+
+def _player(spec):
+    if spec not in _PLAYERS:
+        _PLAYERS[spec] = make_player(spec)
+    return _PLAYERS[spec]
+
+
+def play_game(job):
+    """Plays one game of the tournament in a worker process.
+
+    Arguments:
+        job (tuple): key, black spec, white spec, size, komi, seed
+
+    Returns:
+        (dict): the result as stored in the results file
+    """
+    key, black, white, size, komi, seed = job
+    specs = {BLACK: black, WHITE: white}
+    players = {color: _player(spec) for color, spec in specs.items()}
+    for color, player in players.items():
+        if hasattr(player, 'rng'):
+            player.rng.seed(seed * 2 + color)  # the games can be replayed
+
+    model = Model(size)
+    think = {BLACK: 0., WHITE: 0.}
+    moves = {BLACK: 0, WHITE: 0}
+    illegal = {BLACK: 0, WHITE: 0}
+    max_moves = 3 * size * size
+    start = time.perf_counter()
+
+    while not model.game_over:
+        color = model.turn
+        if len(model.moves) >= max_moves:
+            model.passing()
+            continue
+        move_start = time.perf_counter()
+        pos = players[color].genmove(model)
+        think[color] += time.perf_counter() - move_start
+        moves[color] += 1
+        if pos is None:
+            model.passing()
+        elif not model.place_stone(*pos):
+            illegal[color] += 1
+            model.passing()
+
+    model.find_territory()
+    score = model.get_data()['score']
+    result = winner(model, komi)
+    return {
+        'key': key, 'black': black, 'white': white, 'size': size, 'komi': komi,
+        'winner': None if result is None else 'B' if result else 'W',
+        'score': [score[BLACK], score[WHITE]],
+        'moves': len(model.moves), 'seconds': time.perf_counter() - start,
+        'think': [think[BLACK], think[WHITE]], 'player_moves': [moves[BLACK], moves[WHITE]],
+        'illegal': [illegal[BLACK], illegal[WHITE]],
+    }
+
+
+def schedule(players, games, size, komi, seed=0):
+    """Creates the games of a round robin.
+
+    Returns:
+        (list): jobs for play_game, the colors of a pair alternate; the key
+                of a game contains the seed, so the results of another seed
+                are not taken for it
+    """
+    jobs = []
+    for i, a in enumerate(players):
+        for b in players[i + 1:]:
+            for k in range(games):
+                black, white = (a, b) if k % 2 == 0 else (b, a)
+                key = '%s|%s|%d|%d' % (a, b, seed, k)
+                jobs.append((key, black, white, size, komi, zlib.crc32(key.encode()) ^ seed))
+    return jobs
+
+
+def load(path, size, komi):
+    """Reads the results of an earlier run. A line that was cut off by a
+    crash is ignored, results with another size or komi are skipped.
+
+    Returns:
+        (dict): key -> result
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get('size') == size and result.get('komi') == komi:
+                results[result['key']] = result
+    return results
+
+
+def _scores(results):
+    """Returns (black, white, points of black) of every game."""
+    points = {'B': 1., 'W': 0., None: .5}
+    return [(r['black'], r['white'], points[r['winner']]) for r in results]
+
+
+def _bradley_terry(players, games, iterations=200):
+    """Fits Bradley-Terry strengths with the MM algorithm. Every pair of
+    players gets one virtual draw, so that players without a win or a
+    loss get a finite strength.
+
+    Returns:
+        (tuple): strengths (geometric mean 1, in the order of players) and
+                 the number of games (virtual draws included) of every pair
+    """
+    index = {player: i for i, player in enumerate(players)}
+    count = len(players)
+    wins = [0.] * count
+    played = [[0.] * count for _ in range(count)]
+    for i in range(count):
+        for j in range(count):
+            if i != j:
+                wins[i] += .5
+                played[i][j] += 1.
+    for a, b, points in games:
+        i, j = index[a], index[b]
+        wins[i] += points
+        wins[j] += 1. - points
+        played[i][j] += 1.
+        played[j][i] += 1.
+
+    strength = [1.] * count
+    for _ in range(iterations):
+        strength = [wins[i] / sum(played[i][j] / (strength[i] + strength[j])
+                                  for j in range(count) if j != i)
+                    for i in range(count)]
+        mean = math.exp(sum(math.log(s) for s in strength) / count)
+        strength = [s / mean for s in strength]
+    return strength, played
+
+
+def _inverse(matrix):
+    """Inverts a small square matrix (Gauss-Jordan with pivoting)."""
+    size = len(matrix)
+    rows = [list(row) + [float(i == j) for j in range(size)] for i, row in enumerate(matrix)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        factor = rows[col][col]
+        rows[col] = [value / factor for value in rows[col]]
+        for r in range(size):
+            if r != col and rows[r][col]:
+                scale = rows[r][col]
+                rows[r] = [value - scale * top for value, top in zip(rows[r], rows[col])]
+    return [row[size:] for row in rows]
+
+
+def elo(players, games, iterations=200):
+    """Computes Bradley-Terry ratings (see _bradley_terry).
+
+    Arguments:
+        players (list)  : the player specs
+        games (list)    : (player a, player b, points of a) per game
+
+    Returns:
+        (dict): player -> Elo, the mean of the ratings is 0
+    """
+    strength = _bradley_terry(players, games, iterations)[0]
+    return {player: 400. * math.log10(s) for player, s in zip(players, strength)}
+
+
+def elo_intervals(players, games, z=1.96):
+    """Computes 95 % confidence intervals of the ratings from the standard
+    errors of the Bradley-Terry fit (inverse Fisher information, with the
+    virtual draws and the mean of the ratings fixed at 0).
+
+    Resampling the games cannot do this for small or one-sided results:
+    every sample of a 4-0 match is 4-0 again and the interval has no width.
+    The Fisher information of 4-0 plus the virtual draw still gives an
+    interval of several hundred Elo.
+
+    Returns:
+        (dict): player -> (low, high)
+    """
+    strength, played = _bradley_terry(players, games)
+    count = len(players)
+    # information of the log-strengths: a graph Laplacian with the weights
+    # n_ij p_ij (1 - p_ij); with the constraint sum = 0 its covariance is
+    # (L + 1/count)^-1 - 1/count
+    info = [[0.] * count for _ in range(count)]
+    for i in range(count):
+        for j in range(count):
+            if i != j:
+                p = strength[i] / (strength[i] + strength[j])
+                weight = played[i][j] * p * (1. - p)
+                info[i][j] -= weight
+                info[i][i] += weight
+    covariance = _inverse([[value + 1. / count for value in row] for row in info])
+
+    scale = 400. / math.log(10.)
+    intervals = {}
+    for i, player in enumerate(players):
+        rating = scale * math.log(strength[i])
+        error = scale * math.sqrt(max(0., covariance[i][i] - 1. / count))
+        intervals[player] = (rating - z * error, rating + z * error)
+    return intervals
+
+
+def report(players, results, seconds=None, played=0):
+    """Returns the table of the tournament as text.
+
+    Arguments:
+        players (list)  : the player specs
+        results (list)  : the results of all games
+        seconds (float) : wall time of this run
+        played (int)    : games played in this run
+    """
+    games = _scores(results)
+    ratings = elo(players, games)
+    intervals = elo_intervals(players, games)
+
+    stats = {player: {'games': 0, 'points': 0., 'think': 0., 'moves': 0, 'illegal': 0} for player in players}
+    for result in results:
+        for color, spec in ((0, result['black']), (1, result['white'])):
+            entry = stats[spec]
+            entry['games'] += 1
+            entry['think'] += result['think'][color]
+            entry['moves'] += result['player_moves'][color]
+            entry['illegal'] += result['illegal'][color]
+        points = {'B': 1., 'W': 0., None: .5}[result['winner']]
+        stats[result['black']]['points'] += points
+        stats[result['white']]['points'] += 1. - points
+
+    lines = ['%-30s %6s %7s %7s %17s %10s %8s' % (
+        'player', 'games', 'points', 'elo', '95% interval', 'ms/move', 'illegal')]
+    for player in sorted(players, key=ratings.get, reverse=True):
+        entry = stats[player]
+        low, high = intervals[player]
+        lines.append('%-30s %6d %7.1f %+7.0f %+8.0f..%+7.0f %10.2f %8d' % (
+            player, entry['games'], entry['points'], ratings[player], low, high,
+            entry['think'] / entry['moves'] * 1e3 if entry['moves'] else 0., entry['illegal']))
+
+    total = sum(r['seconds'] for r in results)
+    line = '%d games, %d moves' % (len(results), sum(r['moves'] for r in results))
+    if total:
+        line += ', %.0f games/hour per worker' % (len(results) / total * 3600)
+    if seconds and played:
+        line += ', this run: %d games in %.1f s (%.0f games/hour)' % (played, seconds, played / seconds * 3600)
+    lines.append(line)
+    return '\n'.join(lines)
+
+
+def run(players, games=10, size=9, komi=0., workers=1, out='tournament.jsonl', seed=0, log=None):
+    """Plays the missing games of a tournament and appends them to out.
+
+    Arguments:
+        players (list)  : player specs (see make_player)
+        games (int)     : games per pair of players
+        size (int)      : size of the board
+        komi (float)    : points added to the score of white
+        workers (int)   : number of processes (1: no pool)
+        out (str)       : results file (JSON lines), existing results are kept
+        seed (int)      : seed of the games
+        log (function)  : called with a line of text after every game
+
+    Returns:
+        (tuple): all results, seconds and number of games played in this run
+    """
+    jobs = schedule(players, games, size, komi, seed)
+    done = load(out, size, komi)
+    pending = [job for job in jobs if job[0] not in done]
+
+    start = time.perf_counter()
+    with open(out, 'a+') as f:
+        if f.tell():
+            f.seek(f.tell() - 1)
+            if f.read(1) != '\n':
+                f.write('\n')  # after a line that was cut off
+        if workers > 1 and len(pending) > 1:
+            pool = multiprocessing.Pool(workers)
+            finished = pool.imap_unordered(play_game, pending)
+        else:
+            pool = None
+            finished = map(play_game, pending)
+        try:
+            for number, result in enumerate(finished, 1):
+                f.write(json.dumps(result) + '\n')
+                f.flush()
+                done[result['key']] = result
+                if log is not None:
+                    log('%d/%d %s (B) vs %s (W): %s' % (number, len(pending), result['black'],
+                                                        result['white'], result['winner'] or 'draw'))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    keys = {job[0] for job in jobs}
+    results = [result for key, result in done.items() if key in keys]
+    return results, time.perf_counter() - start, len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays a round-robin tournament between computer players.')
+    parser.add_argument('--player', action='append', required=True,
+                        help="kind[:key=value,...], e.g. random or mcts:playouts=200 (at least two)")
+    parser.add_argument('--games', type=int, default=10, help='games per pair of players')
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--komi', type=float, default=0.)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--out', default='tournament.jsonl', help='results file, resumed if it exists')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quiet', action='store_true', help='do not print every game')
+    args = parser.parse_args()
+
+    if len(set(args.player)) < 2:
+        parser.error('at least two different players are needed')
+    duplicates = sorted({spec for spec in args.player if args.player.count(spec) > 1})
+    if duplicates:
+        parser.error('duplicate player: %s' % ', '.join(duplicates))
+    for spec in args.player:
+        make_player(spec)  # fails early on a wrong spec
+
+    results, seconds, played = run(args.player, args.games, args.size, args.komi, args.workers,
+                                   args.out, args.seed, None if args.quiet else print)
+    print(report(args.player, results, seconds, played))
+
+
+if __name__ == '__main__':
+    main()
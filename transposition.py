@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains a transposition table for results that only depend
+on the position: the territory found by find_territory and the ownership
+estimated by ownership.estimate.
+
+Entries are keyed by the Zobrist hash of the stones, the player to move
+and the size of the board (see position_key). The table is bounded by an
+(estimated) number of bytes and evicts either the least recently used
+entry ('lru') or the entry with the smallest depth ('depth', e.g. the
+number of playouts of an ownership estimate); with 'depth' a new entry
+that is shallower than everything in a full table is not stored.
+
+The table is opt-in: attach wraps find_territory on one Model instance,
+other games are not affected. Move legality is not cached: place_stone
+and is_legal check a move in about 1.5 us on 19x19, a table lookup
+(key, dict, LRU order) takes longer than that even when it hits.
+
+The gain depends on the hit rate (python3 -m benchmarks.transposition,
+random 19x19 games replayed 3 times): with 78 % hits find_territory takes
+about 180-200 us instead of about 240 us, with 33 % hits (a table that
+is too small) it is about 10 % slower than without the table. The table
+pays off most for ownership estimates, a hit saves all the playouts.
+
+    table = TranspositionTable(max_bytes=16 << 20)
+    model = attach(Model(19), table)
+"""
+
+import sys
+import types
+import weakref
+from collections import OrderedDict
+
+BLACK = True
+WHITE = False
+
+# kinds of entries, part of the key
+TERRITORY = 0
+OWNERSHIP = 1
+
+# estimated cost of an entry besides its value: dict slot, int key,
+# entry tuple and the ordering (measured with tracemalloc)
+ENTRY_BYTES = 170
+
+_OWNERS = {None: 0, BLACK: 1, WHITE: 2}
+_COLORS = (None, BLACK, WHITE)
+
+
+def position_key(model, kind=TERRITORY):
+    """Computes the key of an entry.
+
+    Arguments:
+        model (Model): the position (Model.hash, Model.turn and Model.size are
+                       used, the empty boards of all sizes have the hash 0)
+        kind (int)   : TERRITORY or OWNERSHIP
+
+    Returns:
+        (int): key
+    """
+    return ((((model.hash << 1 | model.turn) << 5) | model.size) << 1) | kind
+
+
+class TranspositionTable:
+    """Bounded cache of position results.
+
+    Attributes:
+        hits, misses (int)  : lookups that found / did not find an entry
+        evictions (int)     : entries dropped to make room
+        rejected (int)      : entries that were not stored (too big or,
+                              with 'depth', shallower than the whole table)
+        bytes (int)         : estimated size of the stored entries
+    """
+
+    def __init__(self, max_bytes=64 << 20, policy='lru'):
+        """
+        Arguments:
+            max_bytes (int) : memory limit (estimated, see ENTRY_BYTES)
+            policy (str)    : 'lru' or 'depth'
+        """
+        if policy not in ('lru', 'depth'):
+            raise ValueError("policy must be 'lru' or 'depth'")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.entries = OrderedDict()  # key -> (value, depth, size)
+        self.buckets = {}  # depth -> OrderedDict of keys, oldest first ('depth' only)
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.rejected = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, depth=0):
+        """Looks up an entry.
+
+        Arguments:
+            key (int)   : see position_key
+            depth (int) : minimal depth of the entry
+
+        Returns:
+            the stored value or None
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < depth:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == 'lru':
+            self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, depth=0):
+        """Stores an entry (an existing one with the same key is replaced).
+
+        Arguments:
+            key (int)   : see position_key
+            value       : result, must not be None
+            depth (int) : quality of the result (larger is better)
+
+        Returns:
+            (bool): True if the entry was stored
+        """
+        size = ENTRY_BYTES + sys.getsizeof(value)
+        if size > self.max_bytes:
+            self.rejected += 1  # the table is not emptied for an entry that never fits
+            return False
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self._forget(key, old)
+
+        while self.bytes + size > self.max_bytes:
+            if not self.entries or not self._evict(depth):
+                self.rejected += 1
+                return False
+
+        self.entries[key] = (value, depth, size)
+        self.bytes += size
+        if self.policy == 'depth':
+            self.buckets.setdefault(depth, OrderedDict())[key] = None
+        return True
+
+    def _evict(self, depth):
+        if self.policy == 'lru':
+            key, entry = self.entries.popitem(last=False)
+        else:
+            shallowest = min(self.buckets)
+            if shallowest > depth:
+                return False
+            key = next(iter(self.buckets[shallowest]))
+            entry = self.entries.pop(key)
+        self._forget(key, entry)
+        self.evictions += 1
+        return True
+
+    def _forget(self, key, entry):
+        self.bytes -= entry[2]
+        if self.policy == 'depth':
+            bucket = self.buckets[entry[1]]
+            del bucket[key]
+            if not bucket:
+                del self.buckets[entry[1]]
+
+    def clear(self):
+        """Removes all entries, the counters are kept."""
+        self.entries.clear()
+        self.buckets.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """Returns:
+            (dict): entries, bytes, hits, misses, evictions, rejected and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions, 'rejected': self.rejected,
+                'hit_rate': self.hits / lookups if lookups else 0.}
+
+
+def attach(model, table):
+    """Lets a Model use a transposition table for scoring.
+
+    find_territory reuses the territory of a position it has scored before
+    (if no territory has been marked by hand yet).
+
+    Arguments:
+        model (Model)               : the game, its methods are wrapped on the instance
+        table (TranspositionTable)  : the table, it can be shared by several games
+
+    Returns:
+        (Model): model
+    """
+    # The wrapper is stored on the model, so it only refers to the model
+    # through a proxy: a model -> wrapper -> model cycle would keep every
+    # finished game alive until the cyclic garbage collector finds it.
+    proxy = weakref.proxy(model)
+    find_territory = model.find_territory
+    if getattr(find_territory, '__self__', None) is model:
+        find_territory = types.MethodType(find_territory.__func__, proxy)
+
+    def cached_find_territory():
+        territory = proxy.territory
+        if any(color is not None for row in territory for color in row):
+            return find_territory()
+
+        key = position_key(proxy, TERRITORY)
+        owners = table.get(key)
+        if owners is None:
+            find_territory()
+            table.put(key, bytes(_OWNERS[color] for row in territory for color in row))
+            return
+
+        for p, (x, y) in enumerate(proxy.coords):
+            if owners[p]:
+                proxy._set_territory(x, y, _COLORS[owners[p]])
+        proxy._compute_score()
+        proxy._commit()
+
+    cached_find_territory.__wrapped__ = find_territory
+    model.find_territory = cached_find_territory
+    return model